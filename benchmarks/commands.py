@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+Benchmark dos comandos do CLI em bases de tamanhos crescentes.
+
+Para cada tamanho, gera uma base sintética com o modelo do seed.py e mede
+as operações principais (show, status, start/stop, carga do calendário, painel e
+exportações), relatando percentis de latência e pico de memória em JSON.
+
+Uso (na raiz do projeto):
+    python -m benchmarks.commands [--registros 10000 100000 1000000] [--saida resultados.json]
+"""
+
+import argparse
+import contextlib
+import datetime
+import io
+import json
+import math
+import os
+from pathlib import Path
+import platform
+import sqlite3
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import seed
+from services import databaseConfig
+from services.companyService import invalidate_company_cache
+
+EMPRESAS = 50
+DIAS = 365
+REPETICOES = 10
+
+# Proporção de dias com sessões no modelo do seed (dias úteis x chance de trabalhar)
+DIAS_TRABALHADOS = 5 / 7 * seed.CHANCE_TRABALHAR
+
+
+def percentil(valores, p):
+    """Percentil p (0-100) por interpolação linear"""
+    ordenados = sorted(valores)
+    posicao = (len(ordenados) - 1) * p / 100
+    inferior = math.floor(posicao)
+    superior = math.ceil(posicao)
+    return ordenados[inferior] + (ordenados[superior] - ordenados[inferior]) * (posicao - inferior)
+
+
+def preparar_banco(diretorio, registros):
+    """Gerar (ou reaproveitar) uma base com aproximadamente `registros` sessões"""
+    sessoes_por_dia = max(1, round(registros / (DIAS * DIAS_TRABALHADOS)))
+    caminho = Path(diretorio) / f"bench_{EMPRESAS}e_{DIAS}d_{sessoes_por_dia}s.db"
+
+    if not caminho.exists():
+        with contextlib.redirect_stdout(io.StringIO()):
+            seed.seed(caminho, EMPRESAS, DIAS, sessoes_por_dia, semente=42)
+
+    databaseConfig.set_database_path(caminho)
+    invalidate_company_cache()
+    return caminho
+
+
+def operacoes():
+    """Operações medidas: nome -> (preparo, função). Importadas aqui para respeitar o carregamento sob demanda"""
+    from services.analyticsService import compute_dashboard
+    from services.cursesService import clear_month_cache, load_month_data
+    from services.dataConsultingService import get_current_status, show_records
+    from services.trackService import start_tracking, stop_tracking
+    from exporters.HTMLExporter import exportToHTML
+
+    mes_passado = datetime.date.today().replace(day=1) - datetime.timedelta(days=1)
+    mes_export = datetime.datetime(mes_passado.year, mes_passado.month, 1)
+    empresa = seed.EMPRESAS[0]
+
+    def start_stop():
+        start_tracking(empresa)
+        stop_tracking()
+
+    lista = {
+        "show_records": (None, show_records),
+        "get_current_status": (None, get_current_status),
+        # O seed pode deixar uma sessão ativa, que precisa ser finalizada antes do start
+        "start_stop": (stop_tracking, start_stop),
+        "calendar_load_month": (clear_month_cache,
+                                lambda: load_month_data(mes_passado.year, mes_passado.month)),
+        "export_html": (None, lambda: exportToHTML(empresa, mes_export)),
+        "dashboard_year": (None, lambda: compute_dashboard(data_inicio=(datetime.date.today() - datetime.timedelta(days=364)).isoformat(),
+                                                           data_fim=datetime.date.today().isoformat())),
+    }
+
+    try:
+        from exporters.ExcelExporter import exportToExcel
+        lista["export_excel"] = (None, lambda: exportToExcel(empresa, mes_export))
+    except ImportError:
+        print("Aviso: openpyxl não instalado, exportToExcel não será medido", file=sys.stderr)
+
+    return lista
+
+
+def medir(preparo, funcao, repeticoes):
+    """Executar a operação `repeticoes` vezes e retornar (tempos em segundos, pico de memória em bytes)"""
+    tempos = []
+    with contextlib.redirect_stdout(io.StringIO()) as saida:
+        for _ in range(repeticoes):
+            if preparo:
+                preparo()
+            inicio = time.perf_counter()
+            funcao()
+            tempos.append(time.perf_counter() - inicio)
+            saida.seek(0)
+            saida.truncate()
+
+        # Execução separada para memória: o tracemalloc distorce os tempos
+        if preparo:
+            preparo()
+        tracemalloc.start()
+        funcao()
+        _, pico = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    return tempos, pico
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark dos comandos do timetracker")
+    parser.add_argument("--registros", type=int, nargs="+", default=[10000, 100000, 1000000],
+                        help="Tamanhos aproximados das bases (padrão: 10000 100000 1000000)")
+    parser.add_argument("--repeticoes", type=int, default=REPETICOES,
+                        help=f"Execuções por operação (padrão: {REPETICOES})")
+    parser.add_argument("--dir-bancos",
+                        help="Diretório para guardar e reaproveitar as bases geradas (padrão: temporário)")
+    parser.add_argument("--saida", default="benchmark_comandos.json",
+                        help="Arquivo JSON com os resultados (padrão: benchmark_comandos.json)")
+    args = parser.parse_args()
+
+    resultados = []
+    diretorio_original = os.getcwd()
+
+    with tempfile.TemporaryDirectory() as temporario:
+        diretorio_bancos = args.dir_bancos or temporario
+        os.makedirs(diretorio_bancos, exist_ok=True)
+
+        # As exportações gravam em ./exports: usar o diretório temporário
+        os.chdir(temporario)
+        try:
+            print(f"{'REGISTROS':>10} {'OPERAÇÃO':<22} {'P50':>9} {'P90':>9} {'P99':>9} {'MÁX':>9} {'PICO MEM':>10}")
+            print("-" * 84)
+
+            for registros in args.registros:
+                preparar_banco(diretorio_bancos, registros)
+                total = databaseConfig.getConnection().execute("SELECT COUNT(*) FROM registros").fetchone()[0]
+
+                for nome, (preparo, funcao) in operacoes().items():
+                    tempos, pico = medir(preparo, funcao, args.repeticoes)
+                    resultado = {
+                        "registros": total,
+                        "operacao": nome,
+                        "repeticoes": args.repeticoes,
+                        "p50_ms": round(percentil(tempos, 50) * 1000, 3),
+                        "p90_ms": round(percentil(tempos, 90) * 1000, 3),
+                        "p99_ms": round(percentil(tempos, 99) * 1000, 3),
+                        "min_ms": round(min(tempos) * 1000, 3),
+                        "max_ms": round(max(tempos) * 1000, 3),
+                        "pico_memoria_bytes": pico,
+                    }
+                    resultados.append(resultado)
+                    print(f"{total:>10} {nome:<22} {resultado['p50_ms']:>7.1f}ms {resultado['p90_ms']:>7.1f}ms "
+                          f"{resultado['p99_ms']:>7.1f}ms {resultado['max_ms']:>7.1f}ms {pico / 2**20:>8.1f}MB")
+
+                databaseConfig.close_connections()
+        finally:
+            os.chdir(diretorio_original)
+
+    relatorio = {
+        "gerado_em": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "resultados": resultados,
+    }
+    with open(args.saida, "w", encoding="utf-8") as f:
+        json.dump(relatorio, f, indent=2)
+    print(f"\nResultados salvos em: {args.saida}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Benchmark dos motores de exportação Excel.
+
+Compara o motor original (Workbook em memória) com o motor write-only em
+diferentes quantidades de linhas, usando registros sintéticos gerados sob
+demanda. O tempo é medido em uma execução sem rastreamento; o pico de
+memória, em uma segunda execução com tracemalloc (que deixa o código
+bem mais lento e por isso não entra na medição de tempo).
+
+Uso (na raiz do projeto):
+    python -m benchmarks.excel [--linhas 1000 100000 1000000] [--motores padrao write-only]
+"""
+
+import argparse
+from datetime import datetime, timedelta
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from exporters.ExcelExporter import write_workbook, write_workbook_legacy
+from services.sessionRecord import Session
+
+MOTORES = {
+    "padrao": write_workbook_legacy,
+    "write-only": write_workbook,
+}
+
+
+def gerar_registros(quantidade):
+    """Gerar registros (Session) sem mantê-los em memória"""
+    inicio = datetime(2020, 1, 1, 8, 0, 0)
+    for i in range(quantidade):
+        duracao = 3600 + (i * 37) % 14400
+        fim = inicio + timedelta(seconds=duracao)
+        yield Session(i + 1, inicio.isoformat(), fim.isoformat(), duracao)
+        inicio += timedelta(hours=6)
+
+
+def executar(motor, quantidade, filepath):
+    registros = gerar_registros(quantidade)
+    if motor == "padrao":
+        # O motor original percorre os registros duas vezes e precisa de uma lista
+        registros = list(registros)
+    MOTORES[motor](registros, filepath, "Benchmark")
+
+
+def medir(motor, quantidade, diretorio, medir_memoria=True):
+    """Executar um motor e retornar (segundos, pico de memória em bytes ou None, tamanho do arquivo)"""
+    filepath = os.path.join(diretorio, f"{motor}_{quantidade}.xlsx")
+
+    inicio = time.perf_counter()
+    executar(motor, quantidade, filepath)
+    duracao = time.perf_counter() - inicio
+    tamanho = os.path.getsize(filepath)
+
+    pico = None
+    if medir_memoria:
+        tracemalloc.start()
+        executar(motor, quantidade, filepath)
+        _, pico = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    os.remove(filepath)
+    return duracao, pico, tamanho
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark dos motores de exportação Excel")
+    parser.add_argument("--linhas", type=int, nargs="+", default=[1000, 100000, 1000000],
+                        help="Quantidades de linhas a testar (padrão: 1000 100000 1000000)")
+    parser.add_argument("--motores", nargs="+", choices=sorted(MOTORES), default=["padrao", "write-only"],
+                        help="Motores a comparar")
+    parser.add_argument("--sem-memoria", action="store_true",
+                        help="Não medir o pico de memória (evita executar cada caso duas vezes)")
+    parser.add_argument("--json", help="Arquivo para salvar os resultados em JSON")
+    args = parser.parse_args()
+
+    resultados = []
+    print(f"{'MOTOR':<12} {'LINHAS':>10} {'TEMPO':>10} {'LINHAS/S':>10} {'PICO MEM':>10} {'ARQUIVO':>10}")
+    print("-" * 67)
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        for quantidade in args.linhas:
+            for motor in args.motores:
+                duracao, pico, tamanho = medir(motor, quantidade, diretorio, not args.sem_memoria)
+                resultados.append({
+                    "motor": motor,
+                    "linhas": quantidade,
+                    "segundos": round(duracao, 4),
+                    "pico_memoria_bytes": pico,
+                    "tamanho_arquivo_bytes": tamanho,
+                })
+                memoria = f"{pico / 2**20:.1f}MB" if pico is not None else "-"
+                print(f"{motor:<12} {quantidade:>10} {duracao:>9.2f}s {quantidade / duracao:>10.0f} "
+                      f"{memoria:>10} {tamanho / 2**20:>8.1f}MB")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(resultados, f, indent=2)
+        print(f"\nResultados salvos em: {args.json}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Benchmark de inicialização do CLI.
+
+Executa cada comando com `python -X importtime` contra um banco temporário e
+relata o tempo total de importação e os módulos pesados carregados. Termina
+com código 1 se algum comando leve importar um módulo proibido.
+
+Uso (na raiz do projeto):
+    python -m benchmarks.startup [--repeticoes N]
+"""
+
+import argparse
+import os
+from pathlib import Path
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+PROJECT_DIR = Path(__file__).resolve().parent.parent
+
+COMANDOS = [
+    ["status"],
+    ["start", "Benchmark"],
+    ["stop"],
+    ["show"],
+]
+
+# Comandos auxiliares executados (sem medição) antes e depois de cada repetição
+PREPARO = {"stop": ["start", "Benchmark"]}
+LIMPEZA = {"start": ["stop"]}
+
+# Comandos que não podem carregar estes módulos
+COMANDOS_LEVES = {"status", "start", "stop"}
+MODULOS_PROIBIDOS = {"openpyxl", "curses", "_curses"}
+
+
+def medir_comando(comando, home):
+    """Executar um comando com -X importtime e retornar (segundos, módulos importados, µs de importação)"""
+    env = dict(os.environ, HOME=home, USERPROFILE=home)
+    inicio = time.perf_counter()
+    resultado = subprocess.run(
+        [sys.executable, "-X", "importtime", str(PROJECT_DIR / "timetracker.py"), *comando],
+        cwd=PROJECT_DIR, env=env, capture_output=True, text=True,
+    )
+    duracao = time.perf_counter() - inicio
+
+    modulos = set()
+    total_us = 0
+    for linha in resultado.stderr.splitlines():
+        # Formato: "import time: <self us> | <cumulative us> | <indentação><módulo>"
+        if not linha.startswith("import time:") or "[us]" in linha:
+            continue
+        _, cumulativo, campo_nome = linha[len("import time:"):].split("|")
+        modulos.add(campo_nome.strip())
+        # Somar apenas os módulos de nível superior para não contar tempo em dobro
+        if not campo_nome[1:].startswith(" "):
+            total_us += int(cumulativo)
+
+    return duracao, modulos, total_us
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de inicialização do timetracker")
+    parser.add_argument("--repeticoes", type=int, default=5, help="Execuções por comando (padrão: 5)")
+    args = parser.parse_args()
+
+    falhas = []
+    print(f"{'COMANDO':<12} {'MEDIANA':>10} {'IMPORTS':>10}  MÓDULOS PESADOS")
+    print("-" * 60)
+
+    with tempfile.TemporaryDirectory() as home:
+        # Primeira execução cria o banco e aplica as migrações fora da medição
+        medir_comando(["status"], home)
+
+        for comando in COMANDOS:
+            tempos, imports_us = [], []
+            for _ in range(args.repeticoes):
+                if comando[0] in PREPARO:
+                    medir_comando(PREPARO[comando[0]], home)
+                duracao, modulos, total_us = medir_comando(comando, home)
+                tempos.append(duracao)
+                imports_us.append(total_us)
+                if comando[0] in LIMPEZA:
+                    medir_comando(LIMPEZA[comando[0]], home)
+
+            pesados = sorted({m.split(".")[0] for m in modulos} & MODULOS_PROIBIDOS)
+            if comando[0] in COMANDOS_LEVES and pesados:
+                falhas.append(comando[0])
+
+            print(f"{comando[0]:<12} {statistics.median(tempos) * 1000:>8.1f}ms "
+                  f"{statistics.median(imports_us) / 1000:>8.1f}ms  {', '.join(pesados) or '-'}")
+
+    if falhas:
+        print(f"\nErro: comandos leves importaram módulos pesados: {', '.join(falhas)}")
+        return 1
+
+    print("\n✓ status/start/stop não importam openpyxl nem curses")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,7 +1,19 @@
-from services.cursesService import show_calendar, show_watch_time
-from services.dataConsultingService import get_current_status, show_records
-from services.exportService import export_data
-from services.trackService import start_tracking, stop_tracking
+from utils.lazyImport import lazy_callable
+
+# Os módulos de cada comando só são importados quando o comando é executado,
+# assim 'status', 'start' e 'stop' não pagam pelo carregamento de curses e openpyxl.
+show_calendar       = lazy_callable("services.cursesService", "show_calendar")
+show_watch_time     = lazy_callable("services.cursesService", "show_watch_time")
+calcular_saldo      = lazy_callable("services.dataConsultingService", "calcular_saldo")
+show_dashboard      = lazy_callable("services.analyticsService", "show_dashboard")
+get_current_status  = lazy_callable("services.dataConsultingService", "get_current_status")
+show_records        = lazy_callable("services.dataConsultingService", "show_records")
+export_data         = lazy_callable("services.exportService", "export_data")
+start_tracking      = lazy_callable("services.trackService", "start_tracking")
+stop_tracking       = lazy_callable("services.trackService", "stop_tracking")
+rebuild_totals      = lazy_callable("services.trackService", "rebuild_totals")
+import_file         = lazy_callable("services.importService", "import_file")
+change_storage_format = lazy_callable("services.trackService", "change_storage_format")
 
 
 class TimetrackerController:
@@ -9,12 +21,16 @@ class TimetrackerController:
     routes = {
         "start"     :   lambda args:start_tracking(args.empresa),
         "stop"      :   lambda args:stop_tracking(),
-        "show"      :   lambda args:show_records(args.empresa, args.inicio, args.fim),
-        "saldo"     :   lambda args:print("Ainda não implementado"), #calcular_saldo(args.empresa, args.meta)
-        "status"    :   lambda args:get_current_status(),
+        "show"      :   lambda args:show_records(args.empresa, args.inicio, args.fim, args.limit, args.offset, args.before, args.formato, args.before_id),
+        "saldo"     :   lambda args:calcular_saldo(args.empresa, args.meta, args.inicio, args.fim, args.agrupar),
+        "dashboard" :   lambda args:show_dashboard(args.empresa, args.meta, args.inicio, args.fim),
+        "status"    :   lambda args:get_current_status(args.formato),
         "watch"     :   lambda args:show_watch_time(),
-        "calendar"  :   lambda args:show_calendar(),
-        "export"    :   lambda args: export_data(args.formato, args.empresa, args.data if hasattr(args, 'data') else None)
+        "calendar"  :   lambda args:show_calendar(args.offset, args.ano, args.semanas),
+        "export"    :   lambda args: export_data(args.formato, args.empresa, args.data, args.todas, args.meses, args.jobs),
+        "import"    :   lambda args:import_file(args.arquivo, args.formato),
+        "rebuild"   :   lambda args:rebuild_totals(),
+        "storage"   :   lambda args:change_storage_format(args.formato),
 
     }
     
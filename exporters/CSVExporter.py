@@ -0,0 +1,44 @@
+import csv
+import os
+from datetime import datetime
+from services.companyService import get_company_id, iter_time_records
+
+
+# Tamanho do buffer de escrita do arquivo (as linhas são gravadas em blocos)
+WRITE_BUFFER_SIZE = 1024 * 1024
+
+HEADERS = ['id', 'inicio', 'fim', 'duracao']
+
+
+def exportToCSV(empresa, date_obj=None):
+    """
+    Exporta os registros de tempo do mês para CSV.
+
+    Os valores saem como estão no banco (timestamps ISO, duração em
+    segundos), escritos pelo csv.writer diretamente a partir do cursor.
+    """
+    try:
+        empresa_id = get_company_id(empresa)
+        if not empresa_id:
+            print(f"Empresa '{empresa}' não encontrada")
+            return False
+
+        records = iter_time_records(empresa_id, date_obj, row_factory=None)
+        file_date = (date_obj or datetime.now()).strftime('%m_%Y')
+
+        os.makedirs("exports", exist_ok=True)
+
+        filename = f"{empresa}_{file_date}.csv"
+        filepath = os.path.join("exports", filename)
+
+        with open(filepath, 'w', encoding='utf-8', newline='', buffering=WRITE_BUFFER_SIZE) as f:
+            writer = csv.writer(f)
+            writer.writerow(HEADERS)
+            writer.writerows(records)
+
+        print(f"Relatório CSV exportado com sucesso para: {filepath}")
+        return True
+
+    except Exception as e:
+        print(f"Erro ao exportar para CSV: {e}")
+        return False
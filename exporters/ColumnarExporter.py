@@ -0,0 +1,134 @@
+"""
+Exportação colunar binária dos registros de tempo.
+
+Com pyarrow instalado, grava um arquivo Arrow IPC (.arrow) com as colunas
+id (int64), inicio e fim (timestamp[us], sem fuso) e duracao (int64).
+
+Sem pyarrow, grava o formato TTCOL (.ttcol), gerado com o módulo array:
+
+    cabeçalho:  b"TTCOL001"
+                uint16       quantidade de colunas
+                por coluna:  uint8 tamanho do nome, nome em UTF-8, 1 byte de tipo
+                             ('q' = int64)
+    blocos:     uint32       quantidade de linhas n do bloco (0 encerra o arquivo)
+                por coluna:  n valores int64
+
+Todos os inteiros são little-endian. inicio e fim são microssegundos desde
+1970-01-01 no horário local gravado (sem fuso); valores nulos (ex.: fim de
+uma sessão ativa) são gravados como -2**63. Os blocos permitem gravar e ler
+o arquivo com memória constante; read_columnar() lê o formato.
+"""
+
+from array import array
+import os
+import struct
+import sys
+from datetime import datetime
+from services.companyService import get_company_id, iter_time_record_batches_epoch
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc
+except ImportError:
+    pa = None
+
+
+COLUMNS = ('id', 'inicio', 'fim', 'duracao')
+MAGIC = b"TTCOL001"
+NULL_VALUE = -2**63
+
+# Linhas por bloco (record batch no Arrow)
+BLOCK_SIZE = 65536
+
+
+def _arrow_schema():
+    return pa.schema([
+        ('id', pa.int64()),
+        ('inicio', pa.timestamp('us')),
+        ('fim', pa.timestamp('us')),
+        ('duracao', pa.int64()),
+    ])
+
+def write_arrow(batches, filepath):
+    """Gravar os lotes de registros como um arquivo Arrow IPC, um record batch por lote"""
+    schema = _arrow_schema()
+    with pa.ipc.new_file(filepath, schema) as writer:
+        for batch in batches:
+            colunas = list(zip(*batch))
+            writer.write_batch(pa.record_batch(
+                [pa.array(coluna, type=campo.type) for coluna, campo in zip(colunas, schema)],
+                schema=schema,
+            ))
+
+def write_ttcol(batches, filepath):
+    """Gravar os lotes de registros no formato TTCOL (ver docstring do módulo)"""
+    with open(filepath, 'wb') as f:
+        f.write(MAGIC)
+        f.write(struct.pack('<H', len(COLUMNS)))
+        for nome in COLUMNS:
+            nome_bytes = nome.encode('utf-8')
+            f.write(struct.pack('<B', len(nome_bytes)) + nome_bytes + b'q')
+
+        for batch in batches:
+            f.write(struct.pack('<I', len(batch)))
+            for coluna in zip(*batch):
+                valores = array('q', (NULL_VALUE if valor is None else valor for valor in coluna))
+                if sys.byteorder == 'big':
+                    valores.byteswap()
+                f.write(valores.tobytes())
+
+        f.write(struct.pack('<I', 0))
+
+def read_columnar(filepath):
+    """Ler um arquivo TTCOL, gerando um dicionário {coluna: array('q')} por bloco"""
+    with open(filepath, 'rb') as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"'{filepath}' não é um arquivo TTCOL")
+
+        nomes = []
+        (quantidade,) = struct.unpack('<H', f.read(2))
+        for _ in range(quantidade):
+            (tamanho,) = struct.unpack('<B', f.read(1))
+            nomes.append(f.read(tamanho).decode('utf-8'))
+            if f.read(1) != b'q':
+                raise ValueError("Tipo de coluna não suportado")
+
+        while True:
+            (linhas,) = struct.unpack('<I', f.read(4))
+            if not linhas:
+                break
+            bloco = {}
+            for nome in nomes:
+                valores = array('q')
+                valores.frombytes(f.read(linhas * valores.itemsize))
+                if sys.byteorder == 'big':
+                    valores.byteswap()
+                bloco[nome] = valores
+            yield bloco
+
+def exportToColumnar(empresa, date_obj=None):
+    """Exporta os registros de tempo do mês em formato colunar (Arrow IPC ou TTCOL)"""
+    try:
+        empresa_id = get_company_id(empresa)
+        if not empresa_id:
+            print(f"Empresa '{empresa}' não encontrada")
+            return False
+
+        batches = iter_time_record_batches_epoch(empresa_id, date_obj, BLOCK_SIZE)
+        file_date = (date_obj or datetime.now()).strftime('%m_%Y')
+
+        os.makedirs("exports", exist_ok=True)
+
+        if pa is not None:
+            filepath = os.path.join("exports", f"{empresa}_{file_date}.arrow")
+            write_arrow(batches, filepath)
+        else:
+            filepath = os.path.join("exports", f"{empresa}_{file_date}.ttcol")
+            write_ttcol(batches, filepath)
+
+        print(f"Relatório colunar exportado com sucesso para: {filepath}")
+        return True
+
+    except Exception as e:
+        print(f"Erro ao exportar em formato colunar: {e}")
+        return False
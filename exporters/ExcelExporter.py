@@ -1,10 +1,152 @@
 import os
 from datetime import datetime
 from openpyxl import Workbook
-from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font, Alignment, PatternFill, Border, Side, NamedStyle
 from openpyxl.utils import get_column_letter
 
-from services.companyService import get_company_id, get_time_records
+from services.companyService import get_company_id, iter_time_records
+
+HEADERS = ['ID', 'Data Início', 'Hora Início', 'Data Fim', 'Hora Fim', 'Duração (min)']
+
+
+def _record_row(session):
+    """Converter uma Session nos valores de uma linha da planilha"""
+    return [
+        session.id,
+        session.data_inicio_iso,
+        session.hora_inicio,
+        session.data_fim_iso or '',
+        session.hora_fim or '',
+        session.duracao_minutos,
+    ]
+
+
+def _format_total(total_seconds):
+    total_minutes = total_seconds // 60
+    return f"{total_minutes // 60}h {total_minutes % 60}min ({total_minutes} min)"
+
+
+def _create_named_styles(wb):
+    """Registrar no workbook os estilos usados pelo relatório (uma única vez)"""
+    thin = Side(style='thin')
+    thin_border = Border(left=thin, right=thin, top=thin, bottom=thin)
+
+    wb.add_named_style(NamedStyle(name='relatorio_titulo', font=Font(size=14, bold=True)))
+    wb.add_named_style(NamedStyle(
+        name='relatorio_cabecalho',
+        font=Font(bold=True),
+        fill=PatternFill(start_color='C0C0C0', end_color='C0C0C0', fill_type='solid'),
+        alignment=Alignment(horizontal='center'),
+        border=thin_border,
+    ))
+    wb.add_named_style(NamedStyle(
+        name='relatorio_celula',
+        alignment=Alignment(horizontal='center'),
+        border=thin_border,
+    ))
+    wb.add_named_style(NamedStyle(name='relatorio_total', font=Font(bold=True)))
+
+
+def _styled_cell(ws, style, value=None):
+    cell = WriteOnlyCell(ws, value=value)
+    cell.style = style
+    return cell
+
+
+def write_workbook(records, filepath, titulo):
+    """
+    Gravar a planilha em modo write-only, com memória constante.
+
+    As linhas são serializadas assim que adicionadas, então as mesmas células
+    estilizadas são reaproveitadas em todas as linhas. O total é calculado na
+    mesma passada sobre os registros.
+    """
+    wb = Workbook(write_only=True)
+    _create_named_styles(wb)
+    ws = wb.create_sheet("Registro de Horas")
+
+    for col_num, header in enumerate(HEADERS, 1):
+        ws.column_dimensions[get_column_letter(col_num)].width = max(len(header) + 4, 12)
+
+    # Planilhas write-only não permitem mesclar células: o título fica em A1
+    ws.append([_styled_cell(ws, 'relatorio_titulo', titulo)])
+    ws.append([])
+    ws.append([_styled_cell(ws, 'relatorio_cabecalho', header) for header in HEADERS])
+
+    row_cells = [_styled_cell(ws, 'relatorio_celula') for _ in HEADERS]
+    total_seconds = 0
+    for record in records:
+        for cell, value in zip(row_cells, _record_row(record)):
+            cell.value = value
+        ws.append(row_cells)
+        total_seconds += record.duracao or 0
+
+    ws.append([])
+    ws.append([
+        _styled_cell(ws, 'relatorio_total', "Total de Horas"), None, None, None, None,
+        _styled_cell(ws, 'relatorio_total', _format_total(total_seconds)),
+    ])
+
+    wb.save(filepath)
+
+
+def write_workbook_legacy(records, filepath, titulo):
+    """Gravar a planilha com um Workbook em memória (motor original, mantido para comparação)"""
+    wb = Workbook()
+    ws = wb.active
+    ws.title = "Registro de Horas"
+
+    ws.merge_cells('A1:F1')
+    ws['A1'] = titulo
+    ws['A1'].font = Font(size=14, bold=True)
+    ws['A1'].alignment = Alignment(horizontal='center')
+
+    header_row = 3
+
+    header_fill = PatternFill(start_color='C0C0C0', end_color='C0C0C0', fill_type='solid')
+    header_font = Font(bold=True)
+    header_alignment = Alignment(horizontal='center')
+    thin_border = Border(
+        left=Side(style='thin'),
+        right=Side(style='thin'),
+        top=Side(style='thin'),
+        bottom=Side(style='thin')
+    )
+
+    for col_num, header in enumerate(HEADERS, 1):
+        col_letter = get_column_letter(col_num)
+        cell = ws[f'{col_letter}{header_row}']
+        cell.value = header
+        cell.fill = header_fill
+        cell.font = header_font
+        cell.alignment = header_alignment
+        cell.border = thin_border
+
+        ws.column_dimensions[col_letter].width = max(len(header) + 4, 12)
+
+    row_num = header_row + 1
+    for record in records:
+        row_data = _record_row(record)
+        for col_num, value in enumerate(row_data, 1):
+            cell = ws[f'{get_column_letter(col_num)}{row_num}']
+            cell.value = value
+            cell.border = thin_border
+            cell.alignment = Alignment(horizontal='center')
+
+        row_num += 1
+
+    total_row = row_num + 1
+    ws[f'A{total_row}'] = "Total de Horas"
+    ws[f'A{total_row}'].font = Font(bold=True)
+
+    # Calcular total (duração está em segundos no banco)
+    total_seconds = sum(record.duracao or 0 for record in records)
+    ws[f'F{total_row}'] = _format_total(total_seconds)
+    ws[f'F{total_row}'].font = Font(bold=True)
+
+    wb.save(filepath)
+
 
 def exportToExcel(empresa, date_obj=None):
     try:
@@ -12,13 +154,9 @@ def exportToExcel(empresa, date_obj=None):
         if not empresa_id:
             print(f"Empresa '{empresa}' não encontrada")
             return False
-        
-        records = get_time_records(empresa_id, date_obj)
 
-        wb = Workbook()
-        ws = wb.active
-        ws.title = "Registro de Horas"
-        
+        records = iter_time_records(empresa_id, date_obj)
+
         if date_obj:
             month_year = date_obj.strftime('%B %Y')
             file_date = date_obj.strftime('%m_%Y')
@@ -26,87 +164,16 @@ def exportToExcel(empresa, date_obj=None):
             now = datetime.now()
             month_year = now.strftime('%B %Y')
             file_date = now.strftime('%m_%Y')
-        
-        ws.merge_cells('A1:F1')
-        ws['A1'] = f"Relatório de Horas - {empresa} - {month_year}"
-        ws['A1'].font = Font(size=14, bold=True)
-        ws['A1'].alignment = Alignment(horizontal='center')
-        
-        headers = ['ID', 'Data Início', 'Hora Início', 'Data Fim', 'Hora Fim', 'Duração (min)']
-        header_row = 3
-        
-        header_fill = PatternFill(start_color='C0C0C0', end_color='C0C0C0', fill_type='solid')
-        header_font = Font(bold=True)
-        header_alignment = Alignment(horizontal='center')
-        thin_border = Border(
-            left=Side(style='thin'), 
-            right=Side(style='thin'), 
-            top=Side(style='thin'), 
-            bottom=Side(style='thin')
-        )
-        
-        for col_num, header in enumerate(headers, 1):
-            col_letter = get_column_letter(col_num)
-            cell = ws[f'{col_letter}{header_row}']
-            cell.value = header
-            cell.fill = header_fill
-            cell.font = header_font
-            cell.alignment = header_alignment
-            cell.border = thin_border
-            
-            ws.column_dimensions[col_letter].width = max(len(header) + 4, 12)
-        
-        row_num = header_row + 1
-        for record in records:
-            record_id, inicio, fim, duracao = record
-            
-            inicio_dt = datetime.fromisoformat(inicio.replace(' ', 'T'))
-            fim_dt = datetime.fromisoformat(fim.replace(' ', 'T')) if fim else None
-            
-            inicio_data = inicio_dt.strftime('%Y-%m-%d')
-            inicio_hora = inicio_dt.strftime('%H:%M:%S')
-            
-            if fim_dt:
-                fim_data = fim_dt.strftime('%Y-%m-%d')
-                fim_hora = fim_dt.strftime('%H:%M:%S')
-            else:
-                fim_data = ''
-                fim_hora = ''
-            
-            # Converter duração de segundos para minutos
-            duracao_minutos = int(duracao / 60) if duracao else 0
-            row_data = [record_id, inicio_data, inicio_hora, fim_data, fim_hora, duracao_minutos]
-            for col_num, value in enumerate(row_data, 1):
-                cell = ws[f'{get_column_letter(col_num)}{row_num}']
-                cell.value = value
-                cell.border = thin_border
-                cell.alignment = Alignment(horizontal='center')
-            
-            row_num += 1
-        
-        total_row = row_num + 1
-        ws[f'A{total_row}'] = "Total de Horas"
-        ws[f'A{total_row}'].font = Font(bold=True)
-        
-        # Calcular total (duração está em segundos no banco)
-        total_seconds = sum(record[3] or 0 for record in records)
-        total_minutes = total_seconds / 60
-        total_hours = total_minutes / 60
-        
-        hours = int(total_hours)
-        minutes = int((total_hours - hours) * 60)
-        ws[f'F{total_row}'] = f"{hours}h {minutes}min ({int(total_minutes)} min)"
-        ws[f'F{total_row}'].font = Font(bold=True)
-        
+
         os.makedirs("exports", exist_ok=True)
-        
+
         filename = f"{empresa}_{file_date}.xlsx"
         filepath = os.path.join("exports", filename)
-        wb.save(filepath)
-        
+        write_workbook(records, filepath, f"Relatório de Horas - {empresa} - {month_year}")
+
         print(f"Relatório Excel exportado com sucesso para: {filepath}")
         return True
-        
+
     except Exception as e:
         print(f"Erro ao exportar para Excel: {e}")
-        return False
\ No newline at end of file
+        return False
@@ -1,35 +1,12 @@
 import os
 from datetime import datetime
-from services.companyService import get_company_id, get_time_records
+from services.companyService import get_company_id, get_time_records_totals, iter_time_records
 
 
-def exportToHTML(empresa, date_obj=None):
-    """Exporta os registros de tempo para um arquivo HTML formatado"""
-    try:
-        empresa_id = get_company_id(empresa)
-        if not empresa_id:
-            print(f"Empresa '{empresa}' não encontrada")
-            return False
-
-        records = get_time_records(empresa_id, date_obj)
+# Tamanho do buffer de escrita do arquivo (as linhas são gravadas em blocos)
+WRITE_BUFFER_SIZE = 1024 * 1024
 
-        if date_obj:
-            month_year = date_obj.strftime('%B %Y')
-            file_date = date_obj.strftime('%m_%Y')
-        else:
-            now = datetime.now()
-            month_year = now.strftime('%B %Y')
-            file_date = now.strftime('%m_%Y')
-
-        # Calcular total (duração está em segundos no banco)
-        total_seconds = sum(record[3] or 0 for record in records)
-        total_minutes = total_seconds / 60
-        total_hours = total_minutes / 60
-        hours = int(total_hours)
-        minutes = int((total_hours - hours) * 60)
-
-        # Gerar HTML
-        html_content = f"""<!DOCTYPE html>
+HEADER_TEMPLATE = """<!DOCTYPE html>
 <html lang="pt-BR">
 <head>
     <meta charset="UTF-8">
@@ -158,12 +135,11 @@ def exportToHTML(empresa, date_obj=None):
         <div class="summary">
             <h2>Total de Horas Trabalhadas</h2>
             <div class="total">{hours}h {minutes}min</div>
-            <div class="details">{int(total_minutes)} minutos • {len(records)} registro(s)</div>
+            <div class="details">{total_minutes} minutos • {quantidade} registro(s)</div>
         </div>
 """
 
-        if records:
-            html_content += """
+TABLE_START = """
             <table>
                 <thead>
                     <tr>
@@ -178,70 +154,118 @@ def exportToHTML(empresa, date_obj=None):
                 <tbody>
 """
 
-            for record in records:
-                record_id, inicio, fim, duracao = record
-
-                inicio_dt = datetime.fromisoformat(inicio.replace(' ', 'T'))
-                fim_dt = datetime.fromisoformat(fim.replace(' ', 'T')) if fim else None
-
-                inicio_data = inicio_dt.strftime('%d/%m/%Y')
-                inicio_hora = inicio_dt.strftime('%H:%M:%S')
-
-                if fim_dt:
-                    fim_data = fim_dt.strftime('%d/%m/%Y')
-                    fim_hora = fim_dt.strftime('%H:%M:%S')
-                    # Converter de segundos para minutos
-                    duracao_minutos = duracao / 60
-                    duracao_horas = int(duracao_minutos / 60)
-                    duracao_mins = int(duracao_minutos % 60)
-                    duracao_formatada = f"{duracao_horas}h {duracao_mins}min"
-                else:
-                    fim_data = '-'
-                    fim_hora = '-'
-                    duracao_formatada = 'Em andamento'
-
-                html_content += f"""
+# Template de linha pré-compilado: format é resolvido uma única vez
+ROW_TEMPLATE = """
                     <tr>
-                        <td>{record_id}</td>
-                        <td>{inicio_data}</td>
-                        <td>{inicio_hora}</td>
-                        <td>{fim_data}</td>
-                        <td>{fim_hora}</td>
-                        <td>{duracao_formatada}</td>
+                        <td>{}</td>
+                        <td>{}</td>
+                        <td>{}</td>
+                        <td>{}</td>
+                        <td>{}</td>
+                        <td>{}</td>
                     </tr>
-"""
+""".format
 
-            html_content += """
+TABLE_END = """
                 </tbody>
             </table>
 """
-        else:
-            html_content += """
+
+NO_RECORDS = """
             <div class="no-records">
                 <p>Nenhum registro encontrado para este período</p>
             </div>
 """
 
-        html_content += f"""
+FOOTER_TEMPLATE = """
         </div>
 
         <div class="footer">
-            Gerado em {datetime.now().strftime('%d/%m/%Y às %H:%M:%S')} • Timetracker
+            Gerado em {gerado_em} • Timetracker
         </div>
     </div>
 </body>
 </html>
 """
 
+
+def render_rows(records):
+    """Gerar o HTML de cada registro (Session), um por vez"""
+    row_template = ROW_TEMPLATE
+    for session in records:
+        if session.fim:
+            fim_data = session.data_fim
+            fim_hora = session.hora_fim
+            # Converter de segundos para horas e minutos
+            duracao = session.duracao
+            duracao_formatada = f"{duracao // 3600}h {duracao % 3600 // 60}min"
+        else:
+            fim_data = '-'
+            fim_hora = '-'
+            duracao_formatada = 'Em andamento'
+
+        yield row_template(
+            session.id,
+            session.data_inicio,
+            session.hora_inicio,
+            fim_data,
+            fim_hora,
+            duracao_formatada,
+        )
+
+
+def render_document(empresa, month_year, records, total_seconds, quantidade):
+    """Gerar o documento HTML em partes: cabeçalho, linhas da tabela e rodapé"""
+    total_minutes = total_seconds // 60
+
+    yield HEADER_TEMPLATE.format(
+        empresa=empresa,
+        month_year=month_year,
+        hours=total_minutes // 60,
+        minutes=total_minutes % 60,
+        total_minutes=total_minutes,
+        quantidade=quantidade,
+    )
+
+    if quantidade:
+        yield TABLE_START
+        yield from render_rows(records)
+        yield TABLE_END
+    else:
+        yield NO_RECORDS
+
+    yield FOOTER_TEMPLATE.format(gerado_em=datetime.now().strftime('%d/%m/%Y às %H:%M:%S'))
+
+
+def exportToHTML(empresa, date_obj=None):
+    """Exporta os registros de tempo para um arquivo HTML formatado"""
+    try:
+        empresa_id = get_company_id(empresa)
+        if not empresa_id:
+            print(f"Empresa '{empresa}' não encontrada")
+            return False
+
+        # Totais vêm de uma consulta agregada, pois o cabeçalho é escrito antes das linhas
+        total_seconds, quantidade = get_time_records_totals(empresa_id, date_obj)
+        records = iter_time_records(empresa_id, date_obj)
+
+        if date_obj:
+            month_year = date_obj.strftime('%B %Y')
+            file_date = date_obj.strftime('%m_%Y')
+        else:
+            now = datetime.now()
+            month_year = now.strftime('%B %Y')
+            file_date = now.strftime('%m_%Y')
+
         # Criar diretório exports se não existir
         os.makedirs("exports", exist_ok=True)
 
-        # Salvar arquivo
+        # Salvar arquivo, escrevendo cada parte do documento assim que é gerada
         filename = f"{empresa}_{file_date}.html"
         filepath = os.path.join("exports", filename)
 
-        with open(filepath, 'w', encoding='utf-8') as f:
-            f.write(html_content)
+        with open(filepath, 'w', encoding='utf-8', buffering=WRITE_BUFFER_SIZE) as f:
+            f.writelines(render_document(empresa, month_year, records, total_seconds, quantidade))
 
         print(f"Relatório HTML exportado com sucesso para: {filepath}")
         return True
@@ -2,6 +2,8 @@
 
 import argparse
 
+from utils.outputFormat import FORMATOS_SAIDA
+
 
 class Helper():
 
@@ -22,14 +24,34 @@ class Helper():
         show_parser.add_argument('-e', '--empresa', help='Filtrar por empresa')
         show_parser.add_argument('-i', '--inicio', help='Data de início (YYYY-MM-DD)')
         show_parser.add_argument('-f', '--fim', help='Data de fim (YYYY-MM-DD)')
+        show_parser.add_argument('-l', '--limit', type=int, help='Quantidade máxima de registros exibidos')
+        show_parser.add_argument('-o', '--offset', type=int, default=0, help='Registros a pular antes de exibir (padrão: 0)')
+        show_parser.add_argument('-b', '--before', help='Exibir apenas registros iniciados antes deste instante (YYYY-MM-DD[THH:MM:SS])')
+        show_parser.add_argument('--before-id', dest='before_id', type=int, help='Com --before, desempatar registros iniciados no mesmo instante pelo id (valor mostrado em "Próxima página")')
+        show_parser.add_argument('--format', dest='formato', choices=FORMATOS_SAIDA, default='tabela',
+                                 help='Formato de saída (padrão: tabela)')
         
         # Comando 'saldo'
         saldo_parser = subparsers.add_parser('saldo', help='Calcular saldo de horas')
         saldo_parser.add_argument('-e', '--empresa', help='Filtrar por empresa')
-        saldo_parser.add_argument('-m', '--meta', type=float, default=8.0, help='Meta de horas diárias (padrão: 8.0)')
+        saldo_parser.add_argument('-m', '--meta', type=float, default=8.0,
+                                help='Meta de horas por dia útil (padrão: 8.0), a partir do primeiro dia com registros e sem contar hoje; com --empresa, só nos dias com registros dela')
+        saldo_parser.add_argument('-i', '--inicio', help='Data de início (YYYY-MM-DD)')
+        saldo_parser.add_argument('-f', '--fim', help='Data de fim (YYYY-MM-DD)')
+        saldo_parser.add_argument('-a', '--agrupar', choices=['dia', 'semana', 'mes'], default='dia',
+                                help='Agrupar saldo por dia, semana ou mês (padrão: dia)')
         
+        # Comando 'dashboard'
+        dashboard_parser = subparsers.add_parser('dashboard', help='Painel com totais, saldo e histogramas do período')
+        dashboard_parser.add_argument('-e', '--empresa', help='Filtrar por empresa')
+        dashboard_parser.add_argument('-m', '--meta', type=float, default=8.0, help='Meta de horas por dia útil (padrão: 8.0), com a mesma regra do saldo')
+        dashboard_parser.add_argument('-i', '--inicio', help='Data de início (YYYY-MM-DD, padrão: início do ano atual)')
+        dashboard_parser.add_argument('-f', '--fim', help='Data de fim (YYYY-MM-DD, padrão: fim do ano atual)')
+
         # Comando 'status'
-        subparsers.add_parser('status', help='Verificar status atual')
+        status_parser = subparsers.add_parser('status', help='Verificar status atual')
+        status_parser.add_argument('--format', dest='formato', choices=FORMATOS_SAIDA, default='tabela',
+                                   help='Formato de saída (padrão: tabela)')
         
         # Comando 'watch'
         subparsers.add_parser('watch', help='Mostrar tempo em execução em tempo real')
@@ -37,12 +59,32 @@ class Helper():
         # Comando 'calendar'
         calendar_parser = subparsers.add_parser('calendar', help='Mostrar calendário visual do mês')
         calendar_parser.add_argument('offset', type=int, nargs='?', default=0, 
-                                help='Deslocamento do mês (0=atual, -1=anterior, 1=próximo)')
+                                help='Deslocamento do mês (0=atual, -1=anterior, 1=próximo); com --year ou --weeks, em anos ou blocos de semanas')
+        visao_calendario = calendar_parser.add_mutually_exclusive_group()
+        visao_calendario.add_argument('--year', dest='ano', action='store_true', help='Mapa de calor do ano inteiro')
+        visao_calendario.add_argument('--weeks', dest='semanas', type=int, metavar='N', help='Mapa de calor das últimas N semanas')
         
         # Comando 'export'
         export_parser = subparsers.add_parser('export', help='Exportar relatório em formato específico')
-        export_parser.add_argument('formato', help='Formato de exportação (xls, html)')
-        export_parser.add_argument('empresa', help='Nome da empresa')
+        export_parser.add_argument('formato', help='Formato de exportação (xls, html, csv, columnar)')
+        export_parser.add_argument('empresa', nargs='?', help='Nome da empresa')
         export_parser.add_argument('data', nargs='?', help='Mês/Ano no formato MM/YY (ex: 02/25)')
+        export_parser.add_argument('--all', dest='todas', action='store_true', help='Exportar todas as empresas com registros no período')
+        export_parser.add_argument('--months', dest='meses', help='Intervalo de meses MM/YY..MM/YY para exportação em lote (padrão: mês atual)')
+        export_parser.add_argument('-j', '--jobs', type=int, help='Processos usados na exportação em lote (padrão: número de CPUs)')
+
+        # Comando 'import'
+        import_parser = subparsers.add_parser('import', help='Importar sessões finalizadas de um arquivo CSV, TSV ou NDJSON')
+        import_parser.add_argument('arquivo', help='Arquivo com as colunas empresa, inicio, fim e, opcionalmente, duracao')
+        import_parser.add_argument('--format', dest='formato', choices=('csv', 'tsv', 'ndjson'),
+                                   help='Formato do arquivo (padrão: identificado pela extensão)')
+
+        # Comando 'storage'
+        storage_parser = subparsers.add_parser('storage', help='Mostrar ou converter o formato de armazenamento dos horários')
+        storage_parser.add_argument('formato', nargs='?', choices=('iso', 'epoch'),
+                                    help='Converter os registros para texto ISO (iso) ou segundos UTC com deslocamento (epoch)')
+
+        # Comando 'rebuild'
+        subparsers.add_parser('rebuild', help='Recalcular os totais diários usados por calendar e saldo')
 
         return parser
@@ -1,18 +1,24 @@
 #!/usr/bin/env python3
 """
 Script de seed para popular o banco de dados do Timetracker
-com dados de exemplo em datas recentes.
+com dados sintéticos em datas recentes.
+
+Por padrão cria um histórico pequeno (5 empresas, 30 dias). Os parâmetros
+permitem gerar bases do tamanho da produção para benchmarks, por exemplo:
+
+    python seed.py --companies 300 --days 3650 --sessions-per-day 4000 --seed 42 --yes
 """
 
-import sqlite3
+import argparse
 import random
+import time
 from datetime import datetime, timedelta
-from pathlib import Path
 
-# Configuração do banco de dados
-DB_PATH = Path.home() / ".timetracker.db"
+from services import databaseConfig
+from services.dailyTotals import rebuild_daily_totals
+from services.timeStorage import session_encoder
 
-# Empresas de exemplo
+# Empresas de exemplo (as demais recebem nomes numerados)
 EMPRESAS = [
     "Acme Corp",
     "Tech Solutions",
@@ -23,165 +29,205 @@ EMPRESAS = [
 
 # Configurações de seed
 DIAS_HISTORICO = 30  # Quantos dias de histórico criar
-MIN_HORAS_DIA = 2    # Mínimo de horas por sessão
-MAX_HORAS_DIA = 8    # Máximo de horas por sessão
+MIN_HORAS_DIA = 2    # Mínimo de horas por dia
+MAX_HORAS_DIA = 8    # Máximo de horas por dia
 CHANCE_TRABALHAR = 0.7  # 70% de chance de trabalhar em um dia
+CHANCE_SESSAO_ATIVA = 0.3  # 30% de chance de deixar uma sessão em andamento
+TAMANHO_LOTE = 50000  # Registros inseridos por transação
 
+# Pragmas para carga em massa: sem fsync e com cache maior durante o seed
+PRAGMAS_CARGA = (
+    "PRAGMA synchronous = OFF",
+    "PRAGMA cache_size = -262144",  # ~256 MiB
+    "PRAGMA temp_store = MEMORY",
+)
 
-def limpar_dados():
+
+def limpar_dados(conn):
     """Remove todos os dados existentes do banco"""
     print("Limpando dados existentes...")
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-
-    cursor.execute("DELETE FROM registros")
-    cursor.execute("DELETE FROM empresas")
-
-    conn.commit()
-    conn.close()
+    with databaseConfig.transaction():
+        conn.execute("DELETE FROM registros")
+        conn.execute("DELETE FROM empresas")
+        conn.execute("DELETE FROM totais_diarios")
     print("✓ Dados anteriores removidos")
 
 
-def criar_empresas():
-    """Cria as empresas de exemplo"""
-    print("\nCriando empresas...")
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
+def nomes_empresas(quantidade):
+    """Nomes das empresas de exemplo, completados com nomes numerados"""
+    nomes = EMPRESAS[:quantidade]
+    for i in range(len(nomes), quantidade):
+        nomes.append(f"Empresa {i + 1:04d}")
+    return nomes
 
-    empresa_ids = []
-    for empresa in EMPRESAS:
-        cursor.execute("INSERT INTO empresas (nome) VALUES (?)", (empresa,))
-        empresa_ids.append(cursor.lastrowid)
-        print(f"  ✓ {empresa}")
 
-    conn.commit()
-    conn.close()
+def criar_empresas(conn, quantidade):
+    """Cria as empresas de exemplo"""
+    print(f"\nCriando {quantidade} empresa(s)...")
+    with databaseConfig.transaction():
+        conn.executemany("INSERT INTO empresas (nome) VALUES (?)", ((nome,) for nome in nomes_empresas(quantidade)))
+        empresa_ids = [row[0] for row in conn.execute("SELECT id FROM empresas ORDER BY id")]
+    print(f"  ✓ {len(empresa_ids)} empresa(s)")
 
     return empresa_ids
 
 
-def gerar_horario_trabalho(data):
-    """Gera um horário de início realista para um dia de trabalho"""
-    # Horários de início possíveis: entre 8h e 11h
-    hora_inicio = random.randint(8, 11)
-    minuto_inicio = random.choice([0, 15, 30, 45])
-
-    inicio = datetime(
-        year=data.year,
-        month=data.month,
-        day=data.day,
-        hour=hora_inicio,
-        minute=minuto_inicio,
-        second=0
-    )
+def gerar_registros(rng, empresa_ids, dias, sessoes_por_dia, hoje, codificar):
+    """
+    Gerar registros (empresa_id, inicio, fim, duracao, utc_offset) para os últimos dias,
+    com os timestamps convertidos por `codificar` para o formato do banco.
 
-    return inicio
+    Em cada dia útil trabalhado são criadas `sessoes_por_dia` sessões com
+    início entre 6h e 22h; as horas do dia são divididas entre as sessões,
+    então sessões tardias podem atravessar a meia-noite.
+    """
+    escolher = rng.choice
+    uniforme = rng.uniform
+    aleatorio = rng.random
+    segundos_min = MIN_HORAS_DIA * 3600 / sessoes_por_dia
+    segundos_max = MAX_HORAS_DIA * 3600 / sessoes_por_dia
 
-
-def criar_registros(empresa_ids):
-    """Cria registros de tempo para os últimos dias"""
-    print("\nCriando registros de tempo...")
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-
-    hoje = datetime.now()
-    total_registros = 0
-    total_horas = 0
-
-    # Criar registros para cada dia no período
-    for dias_atras in range(DIAS_HISTORICO, 0, -1):
-        data = hoje - timedelta(days=dias_atras)
+    for dias_atras in range(dias, 0, -1):
+        data = (hoje - timedelta(days=dias_atras)).replace(hour=0, minute=0, second=0, microsecond=0)
 
         # Pular fins de semana (0 = Segunda, 6 = Domingo)
         if data.weekday() >= 5:
             continue
 
         # Chance aleatória de ter trabalhado neste dia
-        if random.random() > CHANCE_TRABALHAR:
+        if aleatorio() > CHANCE_TRABALHAR:
             continue
 
-        # Escolher empresa aleatória
-        empresa_id = random.choice(empresa_ids)
-
-        # Gerar horário de início
-        inicio = gerar_horario_trabalho(data)
-
-        # Duração aleatória (em horas)
-        horas = random.uniform(MIN_HORAS_DIA, MAX_HORAS_DIA)
-        duracao_segundos = int(horas * 3600)
+        for _ in range(sessoes_por_dia):
+            inicio = data + timedelta(seconds=int(uniforme(6 * 3600, 22 * 3600)))
+            duracao = int(uniforme(segundos_min, segundos_max))
+            fim = inicio + timedelta(seconds=duracao)
+            inicio_banco, fim_banco, utc_offset = codificar(inicio, fim)
+            yield (escolher(empresa_ids), inicio_banco, fim_banco, duracao, utc_offset)
 
-        # Calcular horário de fim
-        fim = inicio + timedelta(seconds=duracao_segundos)
 
-        # Inserir registro
-        cursor.execute(
-            """INSERT INTO registros (empresa_id, inicio, fim, duracao)
-               VALUES (?, ?, ?, ?)""",
-            (empresa_id, inicio.isoformat(), fim.isoformat(), duracao_segundos)
-        )
-
-        total_registros += 1
-        total_horas += horas
-
-        # Buscar nome da empresa
-        cursor.execute("SELECT nome FROM empresas WHERE id = ?", (empresa_id,))
-        nome_empresa = cursor.fetchone()[0]
-
-        print(f"  ✓ {data.strftime('%d/%m/%Y')} - {nome_empresa} - {horas:.1f}h")
-
-    # Criar uma sessão ativa (opcional - 30% de chance)
-    if random.random() < 0.3:
+def criar_registros(conn, rng, empresa_ids, dias, sessoes_por_dia, tamanho_lote=TAMANHO_LOTE):
+    """Cria registros de tempo em lotes, cada lote em uma transação"""
+    print("\nCriando registros de tempo...")
+    hoje = datetime.now()
+    total_registros = 0
+    total_segundos = 0
+    inicio_carga = time.perf_counter()
+
+    codificar = session_encoder(conn)
+    registros = gerar_registros(rng, empresa_ids, dias, sessoes_por_dia, hoje, codificar)
+
+    # Índices de registros são reconstruídos uma única vez, ao final da carga
+    with databaseConfig.deferred_indexes(conn, "registros"):
+        while True:
+            lote = []
+            for registro in registros:
+                lote.append(registro)
+                if len(lote) >= tamanho_lote:
+                    break
+            if not lote:
+                break
+
+            with databaseConfig.transaction():
+                conn.executemany(
+                    "INSERT INTO registros (empresa_id, inicio, fim, duracao, utc_offset) VALUES (?, ?, ?, ?, ?)",
+                    lote
+                )
+
+            total_registros += len(lote)
+            total_segundos += sum(registro[3] for registro in lote)
+            taxa = total_registros / (time.perf_counter() - inicio_carga)
+            print(f"  ✓ {total_registros} registros ({taxa:.0f}/s)")
+
+        print("\nReconstruindo índices...")
+
+    # Criar uma sessão ativa (opcional)
+    if rng.random() < CHANCE_SESSAO_ATIVA:
         print("\nCriando sessão ativa...")
-        empresa_id = random.choice(empresa_ids)
+        empresa_id = rng.choice(empresa_ids)
 
         # Iniciar entre 1 e 4 horas atrás
-        horas_atras = random.uniform(1, 4)
+        horas_atras = rng.uniform(1, 4)
         inicio = hoje - timedelta(hours=horas_atras)
 
-        cursor.execute(
-            """INSERT INTO registros (empresa_id, inicio, fim, duracao)
-               VALUES (?, ?, NULL, NULL)""",
-            (empresa_id, inicio.isoformat())
-        )
+        inicio_banco, _, utc_offset = codificar(inicio, None)
+        with databaseConfig.transaction():
+            conn.execute(
+                """INSERT INTO registros (empresa_id, inicio, fim, duracao, utc_offset)
+                   VALUES (?, ?, NULL, NULL, ?)""",
+                (empresa_id, inicio_banco, utc_offset)
+            )
 
-        cursor.execute("SELECT nome FROM empresas WHERE id = ?", (empresa_id,))
-        nome_empresa = cursor.fetchone()[0]
-
-        print(f"  ✓ Sessão ativa para '{nome_empresa}' - {horas_atras:.1f}h em andamento")
+        print(f"  ✓ Sessão ativa para a empresa {empresa_id} - {horas_atras:.1f}h em andamento")
         total_registros += 1
 
-    conn.commit()
-    conn.close()
+    print("\nCalculando totais diários...")
+    with databaseConfig.transaction():
+        rebuild_daily_totals(conn)
 
+    total_horas = total_segundos / 3600
     print(f"\n{'='*50}")
     print(f"Total de registros criados: {total_registros}")
     print(f"Total de horas trabalhadas: {total_horas:.1f}h")
-    print(f"Média por dia útil: {total_horas/total_registros:.1f}h")
+    print(f"Tempo de carga: {time.perf_counter() - inicio_carga:.1f}s")
     print(f"{'='*50}")
 
+    return total_registros
+
+
+def seed(caminho_banco, empresas=len(EMPRESAS), dias=DIAS_HISTORICO, sessoes_por_dia=1,
+         semente=None, tamanho_lote=TAMANHO_LOTE):
+    """Recriar os dados de `caminho_banco` com o volume informado"""
+    rng = random.Random(semente)
+
+    databaseConfig.set_database_path(caminho_banco)
+    databaseConfig.setup_database()
+    conn = databaseConfig.getConnection()
+    for pragma in PRAGMAS_CARGA:
+        conn.execute(pragma)
+
+    try:
+        limpar_dados(conn)
+        empresa_ids = criar_empresas(conn, empresas)
+        return criar_registros(conn, rng, empresa_ids, dias, sessoes_por_dia, tamanho_lote)
+    finally:
+        # A conexão tem os pragmas de carga; as próximas usam os padrões
+        databaseConfig.close_connections()
+
 
 def main():
     """Função principal do seed"""
+    parser = argparse.ArgumentParser(description='Popular o banco do Timetracker com dados sintéticos')
+    parser.add_argument('--companies', type=int, default=len(EMPRESAS),
+                        help=f'Quantidade de empresas (padrão: {len(EMPRESAS)})')
+    parser.add_argument('--days', type=int, default=DIAS_HISTORICO,
+                        help=f'Dias de histórico (padrão: {DIAS_HISTORICO})')
+    parser.add_argument('--sessions-per-day', type=int, default=1,
+                        help='Sessões por dia trabalhado (padrão: 1)')
+    parser.add_argument('--seed', type=int, help='Semente do gerador aleatório, para dados reproduzíveis')
+    parser.add_argument('--batch-size', type=int, default=TAMANHO_LOTE,
+                        help=f'Registros por transação (padrão: {TAMANHO_LOTE})')
+    parser.add_argument('--db', default=databaseConfig.DB_PATH,
+                        help=f'Arquivo do banco (padrão: {databaseConfig.DB_PATH})')
+    parser.add_argument('-y', '--yes', action='store_true', help='Não pedir confirmação')
+    args = parser.parse_args()
+
+    if args.companies < 1 or args.days < 1 or args.sessions_per_day < 1 or args.batch_size < 1:
+        parser.error("--companies, --days, --sessions-per-day e --batch-size devem ser positivos")
+
     print("="*50)
     print("SEED DO TIMETRACKER")
     print("="*50)
 
-    # Verificar se o banco existe
-    if not DB_PATH.exists():
-        print(f"\nErro: Banco de dados não encontrado em {DB_PATH}")
-        print("Execute o timetracker primeiro para criar o banco de dados.")
-        return
-
     # Confirmar com o usuário
-    resposta = input("\nDeseja limpar os dados existentes e criar novos? (s/N): ")
-    if resposta.lower() != 's':
-        print("Operação cancelada.")
-        return
+    if not args.yes:
+        resposta = input(f"\nDeseja limpar os dados existentes em {args.db} e criar novos? (s/N): ")
+        if resposta.lower() != 's':
+            print("Operação cancelada.")
+            return
 
     # Executar seed
-    limpar_dados()
-    empresa_ids = criar_empresas()
-    criar_registros(empresa_ids)
+    seed(args.db, args.companies, args.days, args.sessions_per_day, args.seed, args.batch_size)
 
     print("\n✓ Seed concluído com sucesso!")
     print(f"\nVocê pode visualizar os dados com:")
@@ -0,0 +1,241 @@
+"""
+Painel anual de horas: totais por dia, semana, mês e empresa, saldo em
+relação à meta e histogramas das sessões.
+
+Os dados são carregados em colunas de inteiros e agregados com operações
+vetoriais (bincount, cumsum, searchsorted) do NumPy, se instalado. Sem
+NumPy, as mesmas operações são feitas em Python puro sobre array('q').
+
+Totais diários vêm de totais_diarios (sessões divididas na meia-noite, como
+em calendar e saldo); os histogramas usam (empresa_id, início local em
+segundos desde a época, duracao) de registros.
+"""
+
+from array import array
+import bisect
+import datetime
+import itertools
+import time
+
+from services.companyService import get_company_name
+from services.dailyTotals import balance_start, daily_target
+from services.databaseConfig import getConnection
+from services.timeStorage import bound, local_epoch_sql
+from utils.dateFormat import format_balance, format_duration
+from utils.dateRange import day_range
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+# Limites (em segundos) das faixas do histograma de duração das sessões
+FAIXAS_DURACAO = (0, 15 * 60, 30 * 60, 3600, 2 * 3600, 4 * 3600, 8 * 3600)
+ROTULOS_DURACAO = ("< 15min", "15-30min", "30min-1h", "1-2h", "2-4h", "4-8h", ">= 8h")
+
+# Empresas listadas no painel (as demais são somadas em "Outras")
+MAX_EMPRESAS = 15
+LARGURA_BARRA = 40
+NOMES_MESES = ("Jan", "Fev", "Mar", "Abr", "Mai", "Jun", "Jul", "Ago", "Set", "Out", "Nov", "Dez")
+
+
+def backend_name():
+    return "numpy" if np is not None else "python"
+
+def _load_columns(cursor, quantidade):
+    """Ler o cursor (apenas inteiros) em `quantidade` colunas, sem criar uma lista de linhas"""
+    valores = itertools.chain.from_iterable(cursor)
+    if np is not None:
+        dados = np.fromiter(valores, dtype=np.int64)
+    else:
+        dados = array('q', valores)
+    return [dados[i::quantidade] for i in range(quantidade)]
+
+def _bincount(indices, pesos, tamanho):
+    """Soma de `pesos` por índice (0 <= índice < tamanho); sem pesos, contagem"""
+    if np is not None:
+        if pesos is None:
+            return np.bincount(indices, minlength=tamanho)
+        # Com pesos o NumPy acumula em float64, exato para somas abaixo de 2**53
+        return np.bincount(indices, weights=pesos, minlength=tamanho).astype(np.int64)
+
+    resultado = [0] * tamanho
+    if pesos is None:
+        for indice in indices:
+            resultado[indice] += 1
+    else:
+        for indice, peso in zip(indices, pesos):
+            resultado[indice] += peso
+    return resultado
+
+def _cumsum(valores):
+    if np is not None:
+        return np.cumsum(valores)
+    return list(itertools.accumulate(valores))
+
+def _map(funcao_numpy, funcao_python, valores):
+    """Aplicar uma transformação elemento a elemento (vetorial com NumPy)"""
+    if np is not None:
+        return funcao_numpy(valores)
+    return [funcao_python(valor) for valor in valores]
+
+def _bar(valor, maximo):
+    return "█" * (round(valor / maximo * LARGURA_BARRA) if maximo else 0)
+
+
+def compute_dashboard(empresa=None, meta_horas_diarias=8, data_inicio=None, data_fim=None):
+    """
+    Calcular os agregados do painel para o período [data_inicio, data_fim]
+    (datas YYYY-MM-DD inclusivas; padrão: o ano atual, ou até hoje se apenas
+    o início for informado). Retorna um dicionário com listas de inteiros,
+    independente do backend usado
+    """
+    hoje = datetime.date.today()
+    if not data_fim:
+        data_fim = hoje.isoformat() if data_inicio else f"{hoje.year}-12-31"
+    if not data_inicio:
+        data_inicio = f"{data_fim[:4]}-01-01"
+
+    limite_inicio, limite_fim = day_range(data_inicio, data_fim)
+    primeiro_dia = datetime.date.fromisoformat(limite_inicio)
+    dias = (datetime.date.fromisoformat(limite_fim) - primeiro_dia).days
+    if dias <= 0:
+        raise ValueError("A data de fim deve ser posterior à data de início")
+
+    conn = getConnection()
+    filtro_empresa = ""
+    params = {'inicio': limite_inicio, 'fim': limite_fim}
+    if empresa:
+        filtro_empresa = "AND empresa_id IN (SELECT id FROM empresas WHERE nome LIKE :empresa)"
+        params['empresa'] = f"%{empresa}%"
+
+    # Totais diários por empresa: (dia relativo ao início do período, empresa, segundos)
+    dia_relativo, empresa_ids, segundos = _load_columns(conn.execute(f"""
+        SELECT CAST(julianday(dia) - julianday(:inicio) AS INTEGER), empresa_id, segundos
+        FROM totais_diarios
+        WHERE dia >= :inicio AND dia < :fim {filtro_empresa}
+    """, params), 3)
+
+    # Sessões finalizadas iniciadas no período: (início local em segundos, duração)
+    params_sessoes = dict(params, inicio=bound(conn, limite_inicio), fim=bound(conn, limite_fim))
+    inicio_local, duracoes = _load_columns(conn.execute(f"""
+        SELECT {local_epoch_sql(conn, 'inicio')}, duracao
+        FROM registros
+        WHERE fim IS NOT NULL AND inicio >= :inicio AND inicio < :fim {filtro_empresa}
+    """, params_sessoes), 2)
+
+    por_dia = _bincount(dia_relativo, segundos, dias)
+
+    # Dia da semana (0 = segunda) e mês de cada dia do período
+    semana_inicio = primeiro_dia.weekday()
+    datas = [primeiro_dia + datetime.timedelta(days=i) for i in range(dias)]
+    mes_do_dia = [(data.year - primeiro_dia.year) * 12 + data.month - primeiro_dia.month for data in datas]
+    semana_do_dia = [(i + semana_inicio) // 7 for i in range(dias)]
+
+    por_semana = _bincount(semana_do_dia, por_dia, semana_do_dia[-1] + 1)
+    por_mes = _bincount(mes_do_dia, por_dia, mes_do_dia[-1] + 1)
+
+    maior_id = int(max(empresa_ids)) + 1 if len(empresa_ids) else 0
+    por_empresa_id = _bincount(empresa_ids, segundos, maior_id)
+    por_empresa = sorted(
+        ((int(total), empresa_id) for empresa_id, total in enumerate(por_empresa_id) if total),
+        reverse=True
+    )
+
+    # Saldo até hoje, pela mesma regra do comando saldo (dailyTotals.daily_target),
+    # a partir do primeiro dia com registros
+    meta = int(meta_horas_diarias * 3600)
+    dias_saldo = max(0, min(dias, (hoje - primeiro_dia).days + 1))
+    inicio_saldo = balance_start(conn, limite_inicio, empresa)
+    inicio_saldo = datetime.date.fromisoformat(inicio_saldo) if inicio_saldo else hoje
+    metas = [
+        daily_target(data, trabalhado, meta, inicio_saldo, hoje, bool(empresa))
+        for data, trabalhado in zip(datas[:dias_saldo], por_dia[:dias_saldo])
+    ]
+    diferencas = [int(trabalhado) - meta_dia for trabalhado, meta_dia in zip(por_dia[:dias_saldo], metas)]
+    saldo_acumulado = _cumsum(diferencas) if diferencas else []
+
+    # Histogramas das sessões
+    faixa_duracao = _map(
+        lambda valores: np.searchsorted(np.array(FAIXAS_DURACAO), valores, side='right') - 1,
+        lambda valor: bisect.bisect_right(FAIXAS_DURACAO, valor) - 1,
+        duracoes
+    )
+    hora_inicio = _map(lambda valores: valores % 86400 // 3600, lambda valor: valor % 86400 // 3600, inicio_local)
+
+    return {
+        'primeiro_dia': primeiro_dia,
+        'dias': dias,
+        'por_dia': [int(valor) for valor in por_dia],
+        'por_semana': [int(valor) for valor in por_semana],
+        'por_mes': [int(valor) for valor in por_mes],
+        'por_empresa': por_empresa,
+        'saldo_acumulado': [int(valor) for valor in saldo_acumulado],
+        'meta_total': sum(metas),
+        'sessoes': len(duracoes),
+        'histograma_duracao': [int(valor) for valor in _bincount(faixa_duracao, None, len(FAIXAS_DURACAO))],
+        'histograma_hora': [int(valor) for valor in _bincount(hora_inicio, None, 24)],
+    }
+
+def show_dashboard(empresa=None, meta_horas_diarias=8, data_inicio=None, data_fim=None):
+    """Mostrar o painel de horas do período (padrão: ano atual)"""
+    inicio_calculo = time.perf_counter()
+    try:
+        painel = compute_dashboard(empresa, meta_horas_diarias, data_inicio, data_fim)
+    except ValueError as e:
+        print(f"Erro: {e}")
+        return
+    tempo_calculo = time.perf_counter() - inicio_calculo
+
+    total = sum(painel['por_dia'])
+    if not total:
+        print("Nenhum registro encontrado no período.")
+        return
+
+    primeiro_dia = painel['primeiro_dia']
+    ultimo_dia = primeiro_dia + datetime.timedelta(days=painel['dias'] - 1)
+    dias_trabalhados = sum(1 for valor in painel['por_dia'] if valor)
+    saldo = painel['saldo_acumulado'][-1] if painel['saldo_acumulado'] else 0
+
+    print(f"\nPAINEL {primeiro_dia.strftime('%d/%m/%Y')} a {ultimo_dia.strftime('%d/%m/%Y')}")
+    print("=" * 75)
+    print(f"Total trabalhado: {format_duration(total)} em {painel['sessoes']} sessão(ões), {dias_trabalhados} dia(s)")
+    print(f"Média por dia trabalhado: {format_duration(total // dias_trabalhados)}")
+    print(f"Saldo até hoje (meta {meta_horas_diarias:g}h por dia útil): {format_balance(saldo)}")
+
+    print(f"\n{'EMPRESA':<25} {'HORAS':>12} {'%':>7}")
+    print("-" * 75)
+    for segundos, empresa_id in painel['por_empresa'][:MAX_EMPRESAS]:
+        nome = get_company_name(empresa_id) or f"#{empresa_id}"
+        print(f"{nome[:25]:<25} {format_duration(segundos):>12} {segundos / total:>7.1%}")
+    outras = sum(segundos for segundos, _ in painel['por_empresa'][MAX_EMPRESAS:])
+    if outras:
+        print(f"{'Outras':<25} {format_duration(outras):>12} {outras / total:>7.1%}")
+
+    print(f"\n{'MÊS':<10} {'HORAS':>12}")
+    print("-" * 75)
+    maximo = max(painel['por_mes'])
+    for indice, segundos in enumerate(painel['por_mes']):
+        ano = primeiro_dia.year + (primeiro_dia.month - 1 + indice) // 12
+        mes = (primeiro_dia.month - 1 + indice) % 12
+        print(f"{NOMES_MESES[mes]}/{ano:<6} {format_duration(segundos):>12}  {_bar(segundos, maximo)}")
+
+    semanas = [segundos for segundos in painel['por_semana'] if segundos]
+    print(f"\nSemanas com registros: {len(semanas)} | média: {format_duration(sum(semanas) // len(semanas))}"
+          f" | maior: {format_duration(max(semanas))}")
+
+    print(f"\n{'DURAÇÃO':<10} {'SESSÕES':>12}")
+    print("-" * 75)
+    maximo = max(painel['histograma_duracao'])
+    for rotulo, quantidade in zip(ROTULOS_DURACAO, painel['histograma_duracao']):
+        print(f"{rotulo:<10} {quantidade:>12}  {_bar(quantidade, maximo)}")
+
+    print(f"\n{'INÍCIO':<10} {'SESSÕES':>12}")
+    print("-" * 75)
+    maximo = max(painel['histograma_hora'])
+    for hora, quantidade in enumerate(painel['histograma_hora']):
+        if quantidade:
+            print(f"{hora:02d}h{'':<7} {quantidade:>12}  {_bar(quantidade, maximo)}")
+
+    print(f"\nCalculado em {tempo_calculo * 1000:.1f} ms (backend: {backend_name()})")
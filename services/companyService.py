@@ -1,55 +1,138 @@
 
 
 from datetime import datetime
-import sqlite3
 
-from services.databaseConfig import getConnection
+from services.databaseConfig import getConnection, transaction
+from services.sessionRecord import Session
+from services.timeStorage import bound, local_epoch_us_sql, local_sql
+from utils.dateRange import month_range
 
 
+# Cache nome <-> id das empresas, carregado uma única vez por processo
+_ids_por_nome = {}
+_nomes_por_id = {}
+_cache_carregado = False
+
+
+def _carregar_cache():
+    global _cache_carregado
+    _ids_por_nome.clear()
+    _nomes_por_id.clear()
+    
+    for empresa_id, nome in getConnection().execute("SELECT id, nome FROM empresas"):
+        _ids_por_nome[nome] = empresa_id
+        _nomes_por_id[empresa_id] = nome
+    
+    _cache_carregado = True
+
+def invalidate_company_cache():
+    """Descartar o cache de empresas (ex.: após rollback de uma transação que criou empresas)"""
+    global _cache_carregado
+    _cache_carregado = False
+
+def find_company_id(nome_empresa):
+    """Obter ID da empresa pelo nome, ou None se não existir"""
+    if not _cache_carregado or nome_empresa not in _ids_por_nome:
+        # A empresa pode ter sido criada por outro processo depois da carga
+        _carregar_cache()
+    return _ids_por_nome.get(nome_empresa)
+
+def get_company_name(empresa_id):
+    """Obter o nome da empresa pelo ID, ou None se não existir"""
+    if not _cache_carregado or empresa_id not in _nomes_por_id:
+        _carregar_cache()
+    return _nomes_por_id.get(empresa_id)
+
 def get_company_id(nome_empresa):
     """Obter ID da empresa ou criar se não existir"""
-    conn = getConnection()
-    cursor = conn.cursor()
-    
-    cursor.execute("SELECT id FROM empresas WHERE nome = ?", (nome_empresa,))
-    resultado = cursor.fetchone()
+    empresa_id = find_company_id(nome_empresa)
+    if empresa_id is not None:
+        return empresa_id
     
-    if resultado:
-        empresa_id = resultado[0]
-    else:
-        cursor.execute("INSERT INTO empresas (nome) VALUES (?)", (nome_empresa,))
-        empresa_id = cursor.lastrowid
+    with transaction() as conn:
+        # DO UPDATE (em vez de DO NOTHING) para que RETURNING devolva o id mesmo
+        # se outro processo criar a empresa entre a leitura do cache e este INSERT
+        cursor = conn.execute(
+            """INSERT INTO empresas (nome) VALUES (?)
+               ON CONFLICT (nome) DO UPDATE SET nome = excluded.nome
+               RETURNING id""",
+            (nome_empresa,)
+        )
+        empresa_id = cursor.fetchone()[0]
     
-    conn.commit()
-    conn.close()
+    _ids_por_nome[nome_empresa] = empresa_id
+    _nomes_por_id[empresa_id] = nome_empresa
     
     return empresa_id
 
-def get_time_records(empresa_id, date_obj=None):
+# Quantidade de registros lidos do cursor por vez ao exportar
+FETCH_BATCH_SIZE = 1000
+
+
+def _month_bounds(conn, date_obj):
+    """Limites [inicio, fim) do mês no formato gravado em registros"""
+    if date_obj is None:
+        date_obj = datetime.now()
+    inicio, fim = month_range(date_obj.year, date_obj.month)
+    return bound(conn, inicio), bound(conn, fim)
+
+def iter_time_records(empresa_id, date_obj=None, batch_size=FETCH_BATCH_SIZE, row_factory=Session.row_factory):
+    """
+    Gerar os registros do mês em lotes, sem carregar todos em memória.
+
+    Por padrão cada registro é uma Session; com row_factory=None, tuplas
+    (id, inicio, fim, duracao), para quem apenas repassa os valores.
+    """
     conn = getConnection()
+    first_day_str, last_day_str = _month_bounds(conn, date_obj)
+    
+    # Cursor próprio: o gerador pode ser consumido enquanto a conexão é usada por outras consultas
     cursor = conn.cursor()
+    cursor.row_factory = row_factory
+    cursor.execute(f"""
+        SELECT id, {local_sql(conn, 'inicio')}, {local_sql(conn, 'fim')}, duracao 
+        FROM registros 
+        WHERE empresa_id = ? AND inicio >= ? AND inicio < ?
+        ORDER BY inicio
+    """, (empresa_id, first_day_str, last_day_str))
     
-    if date_obj is None:
-        date_obj = datetime.now()
-        
-    first_day = datetime(date_obj.year, date_obj.month, 1)
-    
-    if date_obj.month == 12:
-        last_day = datetime(date_obj.year + 1, 1, 1)
-    else:
-        last_day = datetime(date_obj.year, date_obj.month + 1, 1)
-        
-    first_day_str = first_day.strftime('%Y-%m-%d 00:00:00')
-    last_day_str = last_day.strftime('%Y-%m-%d 00:00:00')
-    
-    cursor.execute("""
-        SELECT id, inicio, fim, duracao 
+    while True:
+        records = cursor.fetchmany(batch_size)
+        if not records:
+            break
+        yield from records
+
+def iter_time_record_batches_epoch(empresa_id, date_obj=None, batch_size=FETCH_BATCH_SIZE):
+    """
+    Gerar lotes de registros (id, inicio, fim, duracao) do mês com inicio e fim
+    em microssegundos desde a época, para exportações colunares
+    """
+    conn = getConnection()
+    first_day_str, last_day_str = _month_bounds(conn, date_obj)
+    
+    cursor = conn.cursor()
+    cursor.execute(f"""
+        SELECT id, {local_epoch_us_sql(conn, 'inicio')}, {local_epoch_us_sql(conn, 'fim')}, duracao
         FROM registros 
         WHERE empresa_id = ? AND inicio >= ? AND inicio < ?
         ORDER BY inicio
     """, (empresa_id, first_day_str, last_day_str))
     
-    records = cursor.fetchall()
-    conn.close()
+    while True:
+        records = cursor.fetchmany(batch_size)
+        if not records:
+            break
+        yield records
+
+def get_time_records_totals(empresa_id, date_obj=None):
+    """Obter (total de segundos, quantidade de registros) do mês sem percorrer os registros"""
+    conn = getConnection()
+    first_day_str, last_day_str = _month_bounds(conn, date_obj)
+    
+    cursor = conn.execute("""
+        SELECT COALESCE(SUM(duracao), 0), COUNT(*)
+        FROM registros 
+        WHERE empresa_id = ? AND inicio >= ? AND inicio < ?
+    """, (empresa_id, first_day_str, last_day_str))
     
-    return records
+    return cursor.fetchone()
@@ -1,12 +1,18 @@
+import bisect
 import calendar
-from collections import defaultdict
+from collections import OrderedDict, defaultdict
 import curses
 import datetime
+import functools
+import queue
 import sqlite3
+import threading
 
 from services.dataConsultingService import get_active_session_info
-from services.databaseConfig import getConnection
+from services.databaseConfig import get_data_version, getConnection
+from services.timeStorage import invalidate_storage_format
 from utils.dateFormat import format_duration
+from utils.dateRange import month_range
 
 
 def show_watch_time():
@@ -25,106 +31,260 @@ def watch_time(stdscr):
     
     # Configurar tela
     curses.curs_set(0)  # Esconder cursor
-    stdscr.clear()
     
     # Definir taxa de atualização (em segundos)
     refresh_rate = 1
+    stdscr.timeout(refresh_rate * 1000)
+    
+    # A sessão só é relida quando outro processo altera o banco; o tempo
+    # decorrido é calculado localmente a cada atualização
+    versao_dados = None
+    session_info = None
+    tamanho_tela = None
     
     # Loop principal
     running = True
     while running:
-        stdscr.clear()
-        height, width = stdscr.getmaxyx()
-        
-        # Título
-        title = "TIMETRACKER MONITOR"
-        stdscr.addstr(1, (width - len(title)) // 2, title, curses.color_pair(3) | curses.A_BOLD)
-        
-        # Data e hora atual
-        now = datetime.datetime.now()
-        data_hora = now.strftime("%d/%m/%Y %H:%M:%S")
-        stdscr.addstr(3, 2, f"Data/Hora atual: {data_hora}")
-        
-        # Verificar sessão ativa
-        session_info = get_active_session_info()
+        versao = get_data_version()
+        if versao != versao_dados:
+            versao_dados = versao
+            # O formato dos timestamps pode ter sido convertido por outro processo
+            invalidate_storage_format()
+            session_info = get_active_session_info()
+            tamanho_tela = None  # Forçar redesenho completo
         
-        if session_info:
-            # Status
-            status = "ATIVO"
-            stdscr.addstr(5, 2, f"Status: ", curses.A_BOLD)
-            stdscr.addstr(status, curses.color_pair(1) | curses.A_BOLD)
-            
-            # Empresa
-            stdscr.addstr(7, 2, f"Empresa: {session_info['empresa']}")
-            
-            # Horário de início
-            inicio_str = session_info['inicio'].strftime("%d/%m/%Y %H:%M:%S")
-            stdscr.addstr(8, 2, f"Início: {inicio_str}")
-            
-            # Duração
-            duracao_str = format_duration(session_info['duracao'])
-            stdscr.addstr(9, 2, f"Duração: ", curses.A_BOLD)
-            stdscr.addstr(duracao_str, curses.A_BOLD)
-            
-            # Tempo decorrido em formato de barra de progresso (8h = 100%)
-            progress_width = width - 20
-            horas_meta = 8 * 3600  # 8 horas em segundos
-            progress_filled = min(int((session_info['duracao'] / horas_meta) * progress_width), progress_width)
-            
-            stdscr.addstr(11, 2, "Progresso (8h): ")
-            stdscr.addstr(12, 2, "[")
-            stdscr.addstr(12, 3, "=" * progress_filled, curses.color_pair(1))
-            stdscr.addstr(12, 3 + progress_filled, " " * (progress_width - progress_filled))
-            stdscr.addstr(12, 3 + progress_width, "]")
-            
-            # Percentual
-            percent = min(100, int((session_info['duracao'] / horas_meta) * 100))
-            stdscr.addstr(12, 5 + progress_width, f"{percent}%")
-        else:
-            # Status
-            status = "INATIVO"
-            stdscr.addstr(5, 2, f"Status: ", curses.A_BOLD)
-            stdscr.addstr(status, curses.color_pair(2) | curses.A_BOLD)
-            
-            stdscr.addstr(7, 2, "Nenhuma sessão ativa no momento.")
-            stdscr.addstr(9, 2, "Use 'timetracker start <empresa>' para iniciar uma nova sessão.")
+        height, width = stdscr.getmaxyx()
+        if (height, width) != tamanho_tela:
+            tamanho_tela = (height, width)
+            draw_watch_layout(stdscr, session_info)
         
-        # Instruções
-        stdscr.addstr(height-3, 2, "Pressione 'q' para sair", curses.A_DIM)
+        draw_watch_time(stdscr, session_info)
         
-        # Atualizar tela
+        # Atualizar tela (curses envia apenas as linhas alteradas)
         stdscr.refresh()
         
         # Checar input com timeout
-        stdscr.timeout(refresh_rate * 1000)
         key = stdscr.getch()
         
         # Sair se 'q' for pressionado
         if key == ord('q'):
             running = False
 
-def show_calendar(mes_offset=0):
+def draw_watch_layout(stdscr, session_info):
+    """Desenhar as partes do monitor que só mudam quando a sessão muda"""
+    stdscr.erase()
+    height, width = stdscr.getmaxyx()
+    
+    # Título
+    title = "TIMETRACKER MONITOR"
+    stdscr.addstr(1, (width - len(title)) // 2, title, curses.color_pair(3) | curses.A_BOLD)
+    
+    if session_info:
+        # Status
+        status = "ATIVO"
+        stdscr.addstr(5, 2, f"Status: ", curses.A_BOLD)
+        stdscr.addstr(status, curses.color_pair(1) | curses.A_BOLD)
+        
+        # Empresa
+        stdscr.addstr(7, 2, f"Empresa: {session_info['empresa']}")
+        
+        # Horário de início
+        inicio_str = session_info['inicio'].strftime("%d/%m/%Y %H:%M:%S")
+        stdscr.addstr(8, 2, f"Início: {inicio_str}")
+        
+        stdscr.addstr(11, 2, "Progresso (8h): ")
+    else:
+        # Status
+        status = "INATIVO"
+        stdscr.addstr(5, 2, f"Status: ", curses.A_BOLD)
+        stdscr.addstr(status, curses.color_pair(2) | curses.A_BOLD)
+        
+        stdscr.addstr(7, 2, "Nenhuma sessão ativa no momento.")
+        stdscr.addstr(9, 2, "Use 'timetracker start <empresa>' para iniciar uma nova sessão.")
+    
+    # Instruções
+    stdscr.addstr(height-3, 2, "Pressione 'q' para sair", curses.A_DIM)
+
+def draw_watch_time(stdscr, session_info):
+    """Redesenhar apenas as linhas que mudam a cada segundo"""
+    height, width = stdscr.getmaxyx()
+    
+    # Data e hora atual
+    now = datetime.datetime.now()
+    data_hora = now.strftime("%d/%m/%Y %H:%M:%S")
+    stdscr.addstr(3, 2, f"Data/Hora atual: {data_hora}")
+    
+    if not session_info:
+        return
+    
+    # Duração calculada localmente a partir do início da sessão
+    duracao = int((now - session_info['inicio']).total_seconds())
+    duracao_str = format_duration(duracao)
+    stdscr.addstr(9, 2, f"Duração: ", curses.A_BOLD)
+    stdscr.addstr(duracao_str, curses.A_BOLD)
+    stdscr.clrtoeol()
+    
+    # Tempo decorrido em formato de barra de progresso (8h = 100%)
+    progress_width = width - 20
+    horas_meta = 8 * 3600  # 8 horas em segundos
+    progress_filled = min(int((duracao / horas_meta) * progress_width), progress_width)
+    
+    stdscr.addstr(12, 2, "[")
+    stdscr.addstr(12, 3, "=" * progress_filled, curses.color_pair(1))
+    stdscr.addstr(12, 3 + progress_filled, " " * (progress_width - progress_filled))
+    stdscr.addstr(12, 3 + progress_width, "]")
+    
+    # Percentual
+    percent = min(100, int((duracao / horas_meta) * 100))
+    stdscr.addstr(12, 5 + progress_width, f"{percent}%")
+    stdscr.clrtoeol()
+
+# Cores para as empresas
+EMPRESA_CORES = [
+    curses.COLOR_BLUE,    # Azul
+    curses.COLOR_GREEN,   # Verde
+    curses.COLOR_RED,     # Vermelho
+    curses.COLOR_MAGENTA, # Magenta
+    curses.COLOR_CYAN,    # Ciano
+    curses.COLOR_YELLOW,  # Amarelo
+]
+COR_EMPRESA_BASE = 10  # Começamos a numerar do 10 para as empresas
+
+# Nome do mês em português
+NOMES_MESES = [
+    "Janeiro", "Fevereiro", "Março", "Abril", "Maio", "Junho",
+    "Julho", "Agosto", "Setembro", "Outubro", "Novembro", "Dezembro"
+]
+
+# Meses mantidos em memória pelo calendário
+MESES_EM_CACHE = 24
+
+
+def show_calendar(mes_offset=0, ano=False, semanas=None):
     """
     Mostra um calendário visual do mês especificado com horas trabalhadas por empresa
     usando a interface curses para melhor visualização.
     
+    Com `ano` ou `semanas`, mostra em vez disso um mapa de calor do ano ou
+    das últimas N semanas (ver heatmap_curses); o offset passa a deslocar
+    anos ou blocos de N semanas.
+    
     Args:
         mes_offset (int): Deslocamento do mês em relação ao mês atual
                           0 = mês atual, -1 = mês anterior, 1 = próximo mês
+        ano (bool): Mostrar o mapa de calor do ano
+        semanas (int): Mostrar o mapa de calor das últimas N semanas
     """
+    if semanas is not None and semanas < 1:
+        print("Erro: o número de semanas deve ser maior que zero")
+        return
+    
     # Função principal do curses
-    curses.wrapper(calendar_curses, mes_offset)
+    if ano or semanas:
+        curses.wrapper(heatmap_curses, mes_offset, semanas)
+    else:
+        curses.wrapper(calendar_curses, mes_offset)
 
-def calendar_curses(stdscr, mes_offset=0):
+def shift_month(ano, mes, offset):
+    """Retornar (ano, mes) deslocado em `offset` meses"""
+    indice = ano * 12 + (mes - 1) + offset
+    return indice // 12, indice % 12 + 1
+
+# Meses carregados: {(ano, mes): dados}, do menos para o mais recentemente usado.
+# A geração é incrementada a cada descarte do cache; um resultado só é guardado
+# se foi carregado na geração atual, para que uma consulta iniciada antes do
+# descarte não devolva dados antigos ao cache.
+_cache_meses = OrderedDict()
+_cache_lock = threading.Lock()
+_geracao_cache = 0
+
+# Fila de meses a pré-carregar, atendida por uma única thread (com uma única conexão)
+_fila_prefetch = queue.Queue()
+_thread_prefetch = None
+
+
+def load_month_data(ano, mes):
     """
-    Implementação principal do calendário usando curses
+    Carregar os segundos trabalhados por dia e empresa no mês.
+
+    Retorna {dia: {empresa: segundos}} com apenas os dias trabalhados. O
+    resultado é compartilhado pelo cache e não deve ser modificado.
+    """
+    with _cache_lock:
+        dados = _cache_meses.get((ano, mes))
+        if dados is not None:
+            _cache_meses.move_to_end((ano, mes))
+            return dados
+        geracao = _geracao_cache
+    
+    dados = _query_month_data(ano, mes)
+    
+    with _cache_lock:
+        if geracao == _geracao_cache:
+            _cache_meses[(ano, mes)] = dados
+            _cache_meses.move_to_end((ano, mes))
+            while len(_cache_meses) > MESES_EM_CACHE:
+                _cache_meses.popitem(last=False)
+    return dados
+
+def clear_month_cache():
+    """Descartar os meses em cache, inclusive os que estão sendo pré-carregados"""
+    global _geracao_cache
+    with _cache_lock:
+        _geracao_cache += 1
+        _cache_meses.clear()
+
+def _query_month_data(ano, mes):
+    data_inicio_str, data_fim_str = month_range(ano, mes)
     
-    Args:
-        stdscr: Tela padrão do curses
-        mes_offset (int): Deslocamento do mês
+    cursor = getConnection().cursor()
+    cursor.row_factory = sqlite3.Row
+    
+    query = """
+    SELECT 
+        t.dia as data,
+        e.nome as empresa,
+        SUM(t.segundos) as segundos_trabalhados
+    FROM totais_diarios t
+    JOIN empresas e ON t.empresa_id = e.id
+    WHERE t.dia >= ?
+      AND t.dia < ?
+    GROUP BY t.dia, e.nome
+    ORDER BY t.dia, e.nome
     """
     
-    # Configurar cores
+    cursor.execute(query, (data_inicio_str, data_fim_str))
+    
+    # Organizar os dados por dia e empresa
+    dados_por_dia = defaultdict(dict)
+    for reg in cursor:
+        data = datetime.date.fromisoformat(reg['data'])
+        dados_por_dia[data.day][reg['empresa']] = reg['segundos_trabalhados']
+    
+    return dict(dados_por_dia)
+
+def _prefetch_worker():
+    while True:
+        ano, mes = _fila_prefetch.get()
+        try:
+            load_month_data(ano, mes)
+        except Exception:
+            # Ex.: banco bloqueado além do busy_timeout. O mês fica fora do cache e
+            # será lido quando exibido; a thread continua atendendo a fila
+            pass
+
+def prefetch_months(meses):
+    """Carregar meses no cache em segundo plano, por uma thread de longa duração"""
+    global _thread_prefetch
+    if _thread_prefetch is None:
+        _thread_prefetch = threading.Thread(target=_prefetch_worker, daemon=True)
+        _thread_prefetch.start()
+    
+    for ano, mes in meses:
+        _fila_prefetch.put((ano, mes))
+
+def init_calendar_colors():
+    """Configurar os pares de cores usados pelo calendário e pelo mapa de calor"""
     curses.start_color()
     curses.use_default_colors()
     
@@ -133,111 +293,104 @@ def calendar_curses(stdscr, mes_offset=0):
     curses.init_pair(2, curses.COLOR_BLACK, curses.COLOR_GREEN)   # Dias com >8h
     curses.init_pair(3, curses.COLOR_BLACK, curses.COLOR_YELLOW)  # Dias com 4-8h
     curses.init_pair(4, curses.COLOR_BLACK, curses.COLOR_RED)     # Dias com <4h
-    
-    # Cores para as empresas
-    EMPRESA_CORES = [
-        curses.COLOR_BLUE,    # Azul
-        curses.COLOR_GREEN,   # Verde
-        curses.COLOR_RED,     # Vermelho
-        curses.COLOR_MAGENTA, # Magenta
-        curses.COLOR_CYAN,    # Ciano
-        curses.COLOR_YELLOW,  # Amarelo
-    ]
+    curses.init_pair(5, curses.COLOR_GREEN, -1)                   # Células do mapa de calor
     
     # Inicializar mais pares de cores para as empresas
-    for i, cor in enumerate(EMPRESA_CORES, start=10):
+    for i, cor in enumerate(EMPRESA_CORES, start=COR_EMPRESA_BASE):
         curses.init_pair(i, cor, -1)  # Texto colorido em fundo normal
         curses.init_pair(i+20, curses.COLOR_BLACK, cor)  # Fundo colorido com texto preto
+
+def calendar_curses(stdscr, mes_offset=0):
+    """
+    Implementação principal do calendário usando curses
     
-    # Cores definidas
-    COR_TITULO = curses.color_pair(1) | curses.A_BOLD
-    COR_DIA_NORMAL = curses.A_NORMAL
-    COR_DIA_8H = curses.color_pair(2)
-    COR_DIA_4H = curses.color_pair(3)
-    COR_DIA_POUCO = curses.color_pair(4)
-    COR_DESTAQUE = curses.A_BOLD
-    COR_EMPRESA_BASE = 10  # Começamos a numerar do 10 para as empresas
+    Args:
+        stdscr: Tela padrão do curses
+        mes_offset (int): Deslocamento do mês
+    """
+    
+    init_calendar_colors()
     
     # Limpar tela
     stdscr.clear()
     stdscr.refresh()
     
-    # Obter dimensões da tela
-    max_y, max_x = stdscr.getmaxyx()
-    
-    # Obter o mês e ano com base no offset
+    # Mês alvo com base no offset
     hoje = datetime.date.today()
+    ano, mes = shift_month(hoje.year, hoje.month, mes_offset)
     
-    # Calcular o mês alvo
-    mes_alvo = hoje.replace(day=1)
-    if mes_offset > 0:
-        for _ in range(mes_offset):
-            # Avançar para o próximo mês
-            if mes_alvo.month == 12:
-                mes_alvo = mes_alvo.replace(year=mes_alvo.year + 1, month=1)
-            else:
-                mes_alvo = mes_alvo.replace(month=mes_alvo.month + 1)
-    elif mes_offset < 0:
-        for _ in range(abs(mes_offset)):
-            # Retroceder para o mês anterior
-            if mes_alvo.month == 1:
-                mes_alvo = mes_alvo.replace(year=mes_alvo.year - 1, month=12)
-            else:
-                mes_alvo = mes_alvo.replace(month=mes_alvo.month - 1)
-    
-    ano = mes_alvo.year
-    mes = mes_alvo.month
+    versao_dados = get_data_version()
     
-    # Nome do mês em português
-    nomes_meses = [
-        "Janeiro", "Fevereiro", "Março", "Abril", "Maio", "Junho",
-        "Julho", "Agosto", "Setembro", "Outubro", "Novembro", "Dezembro"
-    ]
-    nome_mes = nomes_meses[mes - 1]
-    
-    # Obter o primeiro e último dia do mês
-    _, ultimo_dia = calendar.monthrange(ano, mes)
-    data_inicio = datetime.date(ano, mes, 1)
-    data_fim = datetime.date(ano, mes, ultimo_dia)
-    
-    # Converter para string no formato SQLite
-    data_inicio_str = f"{data_inicio.isoformat()} 00:00:00"
-    data_fim_str = f"{data_fim.isoformat()} 23:59:59"
-    
-    # Consultar o banco de dados para obter os registros do mês
-    conn = getConnection()
-    conn.row_factory = sqlite3.Row
-    cursor = conn.cursor()
-    
-    query = """
-    SELECT 
-        date(r.inicio) as data,
-        e.nome as empresa,
-        SUM(r.duracao) as segundos_trabalhados
-    FROM registros r
-    JOIN empresas e ON r.empresa_id = e.id
-    WHERE r.fim IS NOT NULL
-      AND datetime(r.inicio) >= datetime(?)
-      AND datetime(r.inicio) <= datetime(?)
-    GROUP BY date(r.inicio), e.nome
-    ORDER BY date(r.inicio), e.nome
+    # Loop principal: a navegação troca o mês exibido sem recursão
+    while True:
+        # Descartar meses em cache se outro processo alterou o banco
+        versao = get_data_version()
+        if versao != versao_dados:
+            versao_dados = versao
+            invalidate_storage_format()
+            clear_month_cache()
+        
+        max_y, max_x = stdscr.getmaxyx()
+        calendar_pad, altura_total, largura_calendario = draw_month(ano, mes, load_month_data(ano, mes), max_x)
+        
+        # Pré-carregar os meses vizinhos enquanto o usuário lê o atual
+        prefetch_months([shift_month(ano, mes, -1), shift_month(ano, mes, 1)])
+        
+        # Posição inicial de rolagem
+        pos_y = 0
+        
+        while True:
+            # Mostrar conteúdo visível do pad
+            calendar_pad.refresh(pos_y, 0, 0, 0, min(max_y - 1, altura_total - pos_y), min(max_x - 1, largura_calendario - 1))
+            
+            # Capturar tecla
+            key = stdscr.getch()
+            
+            # Processar tecla
+            if key == ord('q'):  # Sair
+                return
+            elif key == ord('p'):  # Mês anterior
+                ano, mes = shift_month(ano, mes, -1)
+                break
+            elif key == ord('n'):  # Próximo mês
+                ano, mes = shift_month(ano, mes, 1)
+                break
+            elif key == curses.KEY_RESIZE:  # Redesenhar com o novo tamanho
+                break
+            elif key == curses.KEY_UP and pos_y > 0:  # Rolar para cima
+                pos_y = max(0, pos_y - 1)
+            elif key == curses.KEY_DOWN and pos_y < altura_total - max_y:  # Rolar para baixo
+                pos_y = min(altura_total - max_y, pos_y + 1)
+            elif key == curses.KEY_PPAGE:  # Page Up
+                pos_y = max(0, pos_y - max_y // 2)
+            elif key == curses.KEY_NPAGE:  # Page Down
+                pos_y = min(altura_total - max_y, pos_y + max_y // 2)
+            elif key == curses.KEY_HOME:  # Início
+                pos_y = 0
+            elif key == curses.KEY_END:  # Fim
+                pos_y = max(0, altura_total - max_y)
+        
+        # Limpar a tela antes de desenhar o próximo mês
+        stdscr.erase()
+        stdscr.refresh()
+
+def draw_month(ano, mes, dados_por_dia, max_x):
     """
+    Desenhar o calendário e o resumo do mês em um pad.
     
-    cursor.execute(query, (data_inicio_str, data_fim_str))
-    registros = cursor.fetchall()
+    Retorna (pad, altura do conteúdo, largura do calendário).
+    """
+    # Cores definidas
+    COR_TITULO = curses.color_pair(1) | curses.A_BOLD
+    COR_DIA_NORMAL = curses.A_NORMAL
+    COR_DIA_8H = curses.color_pair(2)
+    COR_DIA_4H = curses.color_pair(3)
+    COR_DIA_POUCO = curses.color_pair(4)
+    COR_DESTAQUE = curses.A_BOLD
     
-    # Organizar os dados por dia e empresa
-    dados_por_dia = defaultdict(lambda: defaultdict(int))
-    empresas_no_mes = set()
+    nome_mes = NOMES_MESES[mes - 1]
     
-    for reg in registros:
-        data = datetime.date.fromisoformat(reg['data'])
-        empresa = reg['empresa']
-        segundos = reg['segundos_trabalhados']
-        
-        # Armazenar os segundos trabalhados para esta empresa neste dia
-        dados_por_dia[data.day][empresa] += segundos
-        empresas_no_mes.add(empresa)
+    empresas_no_mes = {empresa for empresas_dia in dados_por_dia.values() for empresa in empresas_dia}
     
     # Converter empresas para lista ordenada
     empresas = sorted(empresas_no_mes)
@@ -300,10 +453,6 @@ def calendar_curses(stdscr, mes_offset=0):
     altura_calendario = 8 + (altura_celula * len(cal))  # Cabeçalho + linhas do calendário
     largura_calendario = largura_celula * 7
     
-    # Criar janela do calendário
-    if altura_calendario > max_y:
-        altura_calendario = max_y - 2
-    
     # Criar pad para permitir rolagem
     calendar_pad = curses.newpad(altura_calendario + 30, largura_calendario)  # +30 para o resumo
     
@@ -359,7 +508,7 @@ def calendar_curses(stdscr, mes_offset=0):
                 continue
             
             # Dados do dia
-            empresas_no_dia = dados_por_dia[dia]
+            empresas_no_dia = dados_por_dia.get(dia, {})
             total_segundos_dia = sum(empresas_no_dia.values())
             total_hm = format_hm(total_segundos_dia)
             
@@ -505,38 +654,284 @@ def calendar_curses(stdscr, mes_offset=0):
     # Altura total do conteúdo
     altura_total = linha_resumo + 2
     
-    # Posição inicial de rolagem
-    pos_y = 0
+    return calendar_pad, altura_total, largura_calendario
+
+# Níveis do mapa de calor: (segundos mínimos no dia, célula desenhada)
+NIVEIS_MAPA = (
+    (0, "· "),
+    (1, "░░"),
+    (2 * 3600, "▒▒"),
+    (4 * 3600, "▓▓"),
+    (8 * 3600, "██"),
+)
+ROTULOS_NIVEIS = ("0h", "< 2h", "2-4h", "4-8h", ">= 8h")
+DIAS_SEMANA_MAPA = ["Seg", "Ter", "Qua", "Qui", "Sex", "Sáb", "Dom"]
+
+# Visões (intervalos) do mapa de calor mantidas em memória
+VISOES_EM_CACHE = 8
+
+# Colunas à esquerda da grade (nomes dos dias) e largura de cada célula
+MARGEM_MAPA = 5
+LARGURA_CELULA_MAPA = 2
+
+
+def heatmap_range(offset=0, semanas=None):
+    """
+    Retornar (inicio, fim, titulo) do mapa de calor: o ano atual deslocado
+    em `offset` anos ou, com `semanas`, as últimas N semanas (até a semana
+    atual, inclusive) deslocadas em blocos de N semanas. fim é exclusivo
+    """
+    hoje = datetime.date.today()
+    if not semanas:
+        ano = hoje.year + offset
+        return datetime.date(ano, 1, 1), datetime.date(ano + 1, 1, 1), f"MAPA DE CALOR - {ano}"
+    
+    fim = hoje - datetime.timedelta(days=hoje.weekday() - 7) + datetime.timedelta(weeks=offset * semanas)
+    inicio = fim - datetime.timedelta(weeks=semanas)
+    ultimo_dia = fim - datetime.timedelta(days=1)
+    titulo = f"MAPA DE CALOR - {semanas} SEMANA(S): {inicio.strftime('%d/%m/%Y')} A {ultimo_dia.strftime('%d/%m/%Y')}"
+    return inicio, fim, titulo
+
+@functools.lru_cache(maxsize=VISOES_EM_CACHE)
+def load_heatmap_data(data_inicio_str, data_fim_str):
+    """
+    Carregar os totais do intervalo [inicio, fim) com uma única consulta agregada.
+    
+    Retorna ({data: segundos}, {empresa: segundos}) com apenas os dias e
+    empresas com horas. O resultado é compartilhado pelo cache e não deve
+    ser modificado.
+    """
+    cursor = getConnection().cursor()
+    cursor.row_factory = sqlite3.Row
+    
+    query = """
+    SELECT 
+        t.dia as data,
+        e.nome as empresa,
+        SUM(t.segundos) as segundos_trabalhados
+    FROM totais_diarios t
+    JOIN empresas e ON t.empresa_id = e.id
+    WHERE t.dia >= ?
+      AND t.dia < ?
+    GROUP BY t.dia, e.nome
+    """
+    
+    cursor.execute(query, (data_inicio_str, data_fim_str))
+    
+    por_dia = defaultdict(int)
+    por_empresa = defaultdict(int)
+    for reg in cursor:
+        por_dia[datetime.date.fromisoformat(reg['data'])] += reg['segundos_trabalhados']
+        por_empresa[reg['empresa']] += reg['segundos_trabalhados']
+    
+    return dict(por_dia), dict(por_empresa)
+
+def heatmap_curses(stdscr, offset=0, semanas=None):
+    """
+    Mapa de calor (estilo GitHub) do ano ou das últimas N semanas: uma linha
+    por dia da semana e uma coluna por semana.
+    
+    O mapa é desenhado uma vez por visão em um pad; a rolagem (setas, Page
+    Up/Down, Home/End) apenas muda a região do pad copiada para a tela, e o
+    curses envia ao terminal só o que mudou.
+    
+    Args:
+        stdscr: Tela padrão do curses
+        offset (int): Deslocamento em anos ou em blocos de `semanas` semanas
+        semanas (int): Quantidade de semanas (None = ano inteiro)
+    """
+    init_calendar_colors()
+    
+    # Limpar tela
+    stdscr.clear()
+    stdscr.refresh()
+    
+    versao_dados = get_data_version()
     
-    # Loop principal
     while True:
-        # Mostrar conteúdo visível do pad
-        calendar_pad.refresh(pos_y, 0, 0, 0, min(max_y - 1, altura_total - pos_y), min(max_x - 1, largura_calendario - 1))
+        # Descartar visões em cache se outro processo alterou o banco
+        versao = get_data_version()
+        if versao != versao_dados:
+            versao_dados = versao
+            invalidate_storage_format()
+            load_heatmap_data.cache_clear()
         
-        # Capturar tecla
-        key = stdscr.getch()
+        inicio, fim, titulo = heatmap_range(offset, semanas)
+        dados = load_heatmap_data(inicio.isoformat(), fim.isoformat())
+        mapa_pad, altura_total, largura_total = draw_heatmap(inicio, fim, titulo, dados, semanas)
+        
+        max_y, max_x = stdscr.getmaxyx()
+        max_pos_y = max(0, altura_total - max_y)
+        max_pos_x = max(0, largura_total - max_x)
         
-        # Processar tecla
-        if key == ord('q'):  # Sair
-            break
-        elif key == ord('p'):  # Mês anterior
-            calendar_curses(stdscr, mes_offset - 1)
-            break
-        elif key == ord('n'):  # Próximo mês
-            calendar_curses(stdscr, mes_offset + 1)
-            break
-        elif key == curses.KEY_UP and pos_y > 0:  # Rolar para cima
-            pos_y = max(0, pos_y - 1)
-        elif key == curses.KEY_DOWN and pos_y < altura_total - max_y:  # Rolar para baixo
-            pos_y = min(altura_total - max_y, pos_y + 1)
-        elif key == curses.KEY_PPAGE:  # Page Up
-            pos_y = max(0, pos_y - max_y // 2)
-        elif key == curses.KEY_NPAGE:  # Page Down
-            pos_y = min(altura_total - max_y, pos_y + max_y // 2)
-        elif key == curses.KEY_HOME:  # Início
-            pos_y = 0
-        elif key == curses.KEY_END:  # Fim
-            pos_y = max(0, altura_total - max_y)
-    
-    # Limpar
-    conn.close()
\ No newline at end of file
+        # Posição inicial de rolagem
+        pos_y = pos_x = 0
+        
+        while True:
+            # Copiar para a tela apenas a região visível do pad
+            mapa_pad.refresh(pos_y, pos_x, 0, 0,
+                             min(max_y, altura_total - pos_y) - 1,
+                             min(max_x, largura_total - pos_x) - 1)
+            
+            # Capturar tecla
+            key = stdscr.getch()
+            
+            # Processar tecla
+            if key == ord('q'):  # Sair
+                return
+            elif key == ord('p'):  # Período anterior
+                offset -= 1
+                break
+            elif key == ord('n'):  # Próximo período
+                offset += 1
+                break
+            elif key == curses.KEY_RESIZE:  # Redesenhar com o novo tamanho
+                break
+            elif key == curses.KEY_UP:  # Rolar para cima
+                pos_y = max(0, pos_y - 1)
+            elif key == curses.KEY_DOWN:  # Rolar para baixo
+                pos_y = min(max_pos_y, pos_y + 1)
+            elif key == curses.KEY_LEFT:  # Semana anterior
+                pos_x = max(0, pos_x - LARGURA_CELULA_MAPA)
+            elif key == curses.KEY_RIGHT:  # Próxima semana
+                pos_x = min(max_pos_x, pos_x + LARGURA_CELULA_MAPA)
+            elif key == curses.KEY_PPAGE:  # Page Up
+                pos_y = max(0, pos_y - max_y // 2)
+            elif key == curses.KEY_NPAGE:  # Page Down
+                pos_y = min(max_pos_y, pos_y + max_y // 2)
+            elif key == curses.KEY_HOME:  # Início
+                pos_y = pos_x = 0
+            elif key == curses.KEY_END:  # Fim
+                pos_y, pos_x = max_pos_y, max_pos_x
+        
+        # Limpar a tela antes de desenhar o próximo período
+        stdscr.erase()
+        stdscr.refresh()
+
+def draw_heatmap(inicio, fim, titulo, dados, semanas=None):
+    """
+    Desenhar o mapa de calor do intervalo [inicio, fim) e o resumo em um pad.
+    
+    Retorna (pad, altura do conteúdo, largura do conteúdo).
+    """
+    COR_TITULO = curses.color_pair(1) | curses.A_BOLD
+    COR_CELULA = curses.color_pair(5)
+    COR_DESTAQUE = curses.A_BOLD
+    
+    por_dia, por_empresa = dados
+    hoje = datetime.date.today()
+    
+    # A grade começa na segunda-feira da semana de `inicio`
+    inicio_grade = inicio - datetime.timedelta(days=inicio.weekday())
+    colunas = ((fim - inicio_grade).days + 6) // 7
+    largura_grade = MARGEM_MAPA + colunas * LARGURA_CELULA_MAPA
+    
+    # Totais por mês, derivados dos totais diários já carregados
+    por_mes = defaultdict(int)
+    for data, segundos in por_dia.items():
+        por_mes[(data.year, data.month)] += segundos
+    meses = []
+    ano, mes = inicio.year, inicio.month
+    while datetime.date(ano, mes, 1) < fim:
+        meses.append((ano, mes))
+        ano, mes = shift_month(ano, mes, 1)
+    
+    empresas_ordenadas = sorted(por_empresa.items(), key=lambda x: x[1], reverse=True)
+    
+    # Linhas: título, meses, grade, legenda, resumo, tabela de meses, empresas e navegação
+    altura_total = 24 + (len(meses) + 2 if len(meses) > 1 else 0) + len(empresas_ordenadas)
+    largura_total = max(largura_grade, 72, len(titulo) + 4) + 1
+    mapa_pad = curses.newpad(altura_total + 1, largura_total)
+    
+    # Desenhar título
+    mapa_pad.addstr(0, 2, titulo, COR_TITULO)
+    
+    # Nomes dos meses acima da primeira semana de cada um
+    linha_meses = 2
+    linha_grade = linha_meses + 1
+    fim_rotulo = 0
+    for coluna in range(colunas):
+        segunda = inicio_grade + datetime.timedelta(weeks=coluna)
+        primeiro = max(segunda, inicio)
+        ultimo = min(segunda + datetime.timedelta(days=6), fim - datetime.timedelta(days=1))
+        if primeiro > ultimo:
+            continue
+        if coluna == 0 or primeiro.day == 1 or ultimo.month != primeiro.month:
+            rotulo_data = primeiro if coluna == 0 or primeiro.day == 1 else ultimo
+            x = MARGEM_MAPA + coluna * LARGURA_CELULA_MAPA
+            if x >= fim_rotulo:
+                rotulo = NOMES_MESES[rotulo_data.month - 1][:3]
+                mapa_pad.addstr(linha_meses, x, rotulo, COR_DESTAQUE)
+                fim_rotulo = x + len(rotulo) + 1
+    
+    # Nomes dos dias da semana
+    for i, dia in enumerate(DIAS_SEMANA_MAPA):
+        mapa_pad.addstr(linha_grade + i, 0, dia)
+    
+    # Células: uma por dia do intervalo (dias futuros ficam em branco)
+    limites = [minimo for minimo, _ in NIVEIS_MAPA]
+    data = inicio
+    while data < fim and data <= hoje:
+        segundos = por_dia.get(data, 0)
+        nivel = bisect.bisect_right(limites, segundos) - 1
+        atributo = COR_CELULA if nivel else curses.A_DIM
+        if data == hoje:
+            atributo |= curses.A_REVERSE
+        coluna = (data - inicio_grade).days // 7
+        mapa_pad.addstr(linha_grade + data.weekday(), MARGEM_MAPA + coluna * LARGURA_CELULA_MAPA,
+                        NIVEIS_MAPA[nivel][1], atributo)
+        data += datetime.timedelta(days=1)
+    
+    # Legenda dos níveis
+    linha = linha_grade + 8
+    col = MARGEM_MAPA
+    for (_, celula), rotulo in zip(NIVEIS_MAPA, ROTULOS_NIVEIS):
+        mapa_pad.addstr(linha, col, celula, COR_CELULA if rotulo != ROTULOS_NIVEIS[0] else curses.A_DIM)
+        mapa_pad.addstr(linha, col + 3, rotulo)
+        col += len(rotulo) + 6
+    linha += 2
+    
+    # Resumo do período
+    total = sum(por_dia.values())
+    dias_trabalhados = len(por_dia)
+    mapa_pad.addstr(linha, 2, "RESUMO DO PERÍODO:", COR_DESTAQUE)
+    linha += 1
+    mapa_pad.addstr(linha, 2, f"- Total trabalhado: {format_duration(total)} em {dias_trabalhados} dia(s)")
+    linha += 1
+    if dias_trabalhados:
+        maior_dia, maior_total = max(por_dia.items(), key=lambda x: x[1])
+        mapa_pad.addstr(linha, 2, f"- Média por dia trabalhado: {format_duration(total // dias_trabalhados)}")
+        linha += 1
+        mapa_pad.addstr(linha, 2, f"- Maior dia: {maior_dia.strftime('%d/%m/%Y')} ({format_duration(maior_total)})")
+        linha += 1
+    linha += 1
+    
+    # Totais por mês (apenas quando o período tem mais de um mês)
+    if len(meses) > 1:
+        mapa_pad.addstr(linha, 2, "MÊS", COR_DESTAQUE)
+        mapa_pad.addstr(linha, 22, "HORAS", COR_DESTAQUE)
+        linha += 1
+        for ano, mes in meses:
+            mapa_pad.addstr(linha, 2, f"{NOMES_MESES[mes - 1]}/{ano}")
+            mapa_pad.addstr(linha, 22, f"{por_mes[(ano, mes)] / 3600:>7.2f}h")
+            linha += 1
+        linha += 1
+    
+    # Totais por empresa
+    mapa_pad.addstr(linha, 2, "EMPRESA", COR_DESTAQUE)
+    mapa_pad.addstr(linha, 22, "HORAS", COR_DESTAQUE)
+    mapa_pad.addstr(linha, 32, "%TEMPO", COR_DESTAQUE)
+    linha += 1
+    for i, (empresa, segundos) in enumerate(empresas_ordenadas):
+        cor_empresa = curses.color_pair(COR_EMPRESA_BASE + (i % len(EMPRESA_CORES)))
+        mapa_pad.addstr(linha, 2, empresa[:18], cor_empresa)
+        mapa_pad.addstr(linha, 22, f"{segundos / 3600:>7.2f}h")
+        mapa_pad.addstr(linha, 32, f"{segundos / total * 100:>6.2f}%")
+        linha += 1
+    linha += 1
+    
+    # Instruções de navegação
+    periodo = "bloco de semanas" if semanas else "ano"
+    mapa_pad.addstr(linha, 2, f"Navegação: 'p'/'n' = {periodo} anterior/próximo, setas = rolar, 'q' = sair")
+    
+    return mapa_pad, linha + 2, largura_total
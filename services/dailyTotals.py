@@ -0,0 +1,119 @@
+"""
+Manutenção da tabela totais_diarios, um resumo por dia e empresa dos registros
+finalizados. As funções recebem a conexão para que possam participar da
+transação de quem as chama (stop, importação, migrações).
+
+Sessões que atravessam a meia-noite são divididas entre todos os dias que
+tocam: cada dia recebe os segundos efetivamente trabalhados nele e conta a
+sessão uma vez. Os segundos de cada trecho são calculados como diferenças de
+deslocamentos (truncados) a partir do início da sessão e o último trecho
+fecha com a duração gravada, de modo que a soma dos trechos é exatamente
+registros.duracao.
+"""
+
+from services.timeStorage import local_sql
+
+# {origem} é um SELECT que produz (empresa_id, inicio, fim, duracao)
+_SPLIT_AND_ADD_SQL = """
+WITH RECURSIVE
+sessoes(empresa_id, inicio, fim, duracao) AS ({origem}),
+trechos(empresa_id, inicio, fim, duracao, dia) AS (
+    SELECT empresa_id, inicio, fim, duracao, date(inicio) FROM sessoes
+    UNION ALL
+    SELECT empresa_id, inicio, fim, duracao, date(dia, '+1 day')
+    FROM trechos
+    WHERE julianday(dia, '+1 day') < julianday(fim)
+),
+segundos(dia, empresa_id, segundos) AS (
+    SELECT
+        dia,
+        empresa_id,
+        CASE WHEN julianday(dia, '+1 day') >= julianday(fim) THEN duracao
+             ELSE CAST(ROUND((julianday(dia, '+1 day') - julianday(inicio)) * 86400000) AS INTEGER) / 1000
+        END
+        - CASE WHEN dia = date(inicio) THEN 0
+               ELSE CAST(ROUND((julianday(dia) - julianday(inicio)) * 86400000) AS INTEGER) / 1000
+          END
+    FROM trechos
+)
+INSERT INTO totais_diarios (dia, empresa_id, segundos, sessoes)
+SELECT dia, empresa_id, SUM(segundos), COUNT(*)
+FROM segundos
+WHERE true
+GROUP BY dia, empresa_id
+ON CONFLICT (dia, empresa_id) DO UPDATE SET
+    segundos = segundos + excluded.segundos,
+    sessoes = sessoes + excluded.sessoes
+"""
+
+
+def add_session_to_daily_totals(conn, empresa_id, inicio, fim, duracao):
+    """Somar uma sessão finalizada (inicio e fim em texto ISO local) aos totais de cada dia que ela toca"""
+    conn.execute(
+        _SPLIT_AND_ADD_SQL.format(origem="SELECT ?, ?, ?, ?"),
+        (empresa_id, inicio, fim, duracao)
+    )
+
+
+def add_table_to_daily_totals(conn, tabela):
+    """Somar aos totais todas as sessões de `tabela` (colunas empresa_id, inicio, fim, duracao, utc_offset)"""
+    conn.execute(_SPLIT_AND_ADD_SQL.format(
+        origem=f"SELECT empresa_id, {local_sql(conn, 'inicio')}, {local_sql(conn, 'fim')}, duracao FROM {tabela}"
+    ))
+
+
+def rebuild_daily_totals(conn):
+    """Recalcular toda a tabela totais_diarios a partir de registros"""
+    conn.execute("DELETE FROM totais_diarios")
+    conn.execute(_SPLIT_AND_ADD_SQL.format(
+        origem=f"SELECT empresa_id, {local_sql(conn, 'inicio')}, {local_sql(conn, 'fim')}, duracao "
+               "FROM registros WHERE fim IS NOT NULL"
+    ))
+
+
+# Regra do saldo de horas, comum aos comandos saldo e dashboard: a meta diária
+# vale nos dias úteis a partir do primeiro dia com registros (da empresa, se
+# filtrada). Hoje, ainda em andamento, conta as horas trabalhadas mas não a
+# meta. Sem filtro de empresa, dias úteis sem registros contam a meta inteira;
+# com filtro, a meta só vale nos dias com registros da empresa, pois nos demais
+# o trabalho pode ter sido para outras empresas.
+_DAILY_TARGET_SQL = """CASE
+    WHEN {dia} < :inicio_saldo OR {dia} >= :hoje OR strftime('%w', {dia}) IN ('0', '6') THEN 0
+    WHEN :por_empresa AND {trabalhado} = 0 THEN 0
+    ELSE :meta
+END"""
+
+
+def first_recorded_day(conn, empresa=None):
+    """Primeiro dia (YYYY-MM-DD) com totais, opcionalmente da empresa (nome LIKE); None se não houver"""
+    if empresa:
+        return conn.execute(
+            "SELECT MIN(dia) FROM totais_diarios WHERE empresa_id IN (SELECT id FROM empresas WHERE nome LIKE ?)",
+            (f"%{empresa}%",)
+        ).fetchone()[0]
+    return conn.execute("SELECT MIN(dia) FROM totais_diarios").fetchone()[0]
+
+
+def balance_start(conn, limite_inicio=None, empresa=None):
+    """Primeiro dia do saldo: o maior entre `limite_inicio` e o primeiro dia com registros (None se não houver)"""
+    primeiro = first_recorded_day(conn, empresa)
+    if primeiro is None:
+        return None
+    return max(primeiro, limite_inicio) if limite_inicio else primeiro
+
+
+def daily_target(dia, trabalhado, meta, inicio_saldo, hoje, por_empresa):
+    """Meta em segundos de `dia` (datetime.date) pela regra do saldo; `trabalhado` são os segundos do dia"""
+    if dia < inicio_saldo or dia >= hoje or dia.weekday() >= 5:
+        return 0
+    if por_empresa and not trabalhado:
+        return 0
+    return meta
+
+
+def daily_target_sql(dia, trabalhado):
+    """
+    Expressão SQL equivalente a daily_target, com as colunas (texto YYYY-MM-DD e
+    segundos) informadas e os parâmetros :inicio_saldo, :hoje, :por_empresa e :meta
+    """
+    return _DAILY_TARGET_SQL.format(dia=dia, trabalhado=trabalhado)
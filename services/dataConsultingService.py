@@ -1,67 +1,155 @@
 import datetime
 import sqlite3
+import sys
 
+from services.companyService import get_company_name
+from services.dailyTotals import balance_start, daily_target_sql
 from services.databaseConfig import getConnection
+from services.sessionRecord import Session
+from services.timeStorage import bound, local_sql
 from services.trackService import check_active_session
-from utils.dateFormat import format_duration
+from utils.dateFormat import format_balance, format_duration
+from utils.dateRange import day_range
+from utils.outputFormat import write_object, write_rows
 
 
-def show_records(empresa=None, data_inicio=None, data_fim=None):
-    """Mostrar registros de tempo"""
-    conn = getConnection()
-    conn.row_factory = sqlite3.Row
-    cursor = conn.cursor()
+# Linhas de saída acumuladas antes de cada escrita no terminal
+SHOW_WRITE_CHUNK = 500
 
-    query = """
-    SELECT e.nome as empresa, r.inicio, r.fim, r.duracao
-    FROM registros r
-    JOIN empresas e ON r.empresa_id = e.id
-    WHERE r.fim IS NOT NULL
-    """
+# Colunas das saídas legíveis por máquina (--format)
+SHOW_COLUMNS = ('empresa', 'inicio', 'fim', 'duracao')
+STATUS_COLUMNS = ('ativa', 'empresa', 'inicio', 'duracao')
+
+
+def _records_filter(conn, empresa, limite_inicio, limite_fim):
+    """Montar o WHERE (sem paginação) usado pela listagem e pelo total de show"""
+    where = "WHERE r.fim IS NOT NULL"
     params = []
     
     if empresa:
-        query += " AND e.nome LIKE ?"
+        where += " AND e.nome LIKE ?"
         params.append(f"%{empresa}%")
     
-    if data_inicio:
-        query += " AND date(r.inicio) >= ?"
-        params.append(data_inicio)
+    if limite_inicio:
+        where += " AND r.inicio >= ?"
+        params.append(bound(conn, limite_inicio))
     
-    if data_fim:
-        query += " AND date(r.inicio) <= ?"
-        params.append(data_fim)
+    if limite_fim:
+        where += " AND r.inicio < ?"
+        params.append(bound(conn, limite_fim))
     
-    query += " ORDER BY r.inicio DESC"
+    return where, params
+
+def show_records(empresa=None, data_inicio=None, data_fim=None, limit=None, offset=0, before=None, formato='tabela', before_id=None):
+    """
+    Mostrar registros de tempo, do mais recente para o mais antigo.
+
+    As linhas são escritas à medida que são lidas do cursor. `before` pagina
+    por chave (registros iniciados antes do valor informado ou, com
+    `before_id`, antes do par (inicio, id), que desempata registros com o
+    mesmo início), enquanto `limit`/`offset` limitam a página. O total é calculado sobre todo o
+    filtro por uma consulta agregada separada, após as linhas.
+
+    Com `formato` json, ndjson, csv ou tsv, apenas as linhas são escritas,
+    sem formatação (timestamps ISO no horário local e duração em segundos).
+    """
+    try:
+        limite_inicio, limite_fim = day_range(data_inicio, data_fim)
+        if before is not None:
+            before = datetime.datetime.fromisoformat(before).isoformat()
+    except ValueError as e:
+        print(f"Erro: {e}")
+        return
+    if before_id is not None and before is None:
+        print("Erro: --before-id deve ser usado junto com --before")
+        return
+
+    conn = getConnection()
+    where, params = _records_filter(conn, empresa, limite_inicio, limite_fim)
+
+    inicio_sql, fim_sql = local_sql(conn, 'r.inicio'), local_sql(conn, 'r.fim')
+    if formato == 'tabela':
+        colunas = f"r.id, {inicio_sql}, {fim_sql}, r.duracao, e.nome"
+    else:
+        colunas = f"e.nome, {inicio_sql}, {fim_sql}, r.duracao"
+
+    query = f"""
+    SELECT {colunas}
+    FROM registros r
+    JOIN empresas e ON r.empresa_id = e.id
+    {where}
+    """
+    params_pagina = list(params)
     
-    cursor.execute(query, params)
-    registros = cursor.fetchall()
+    if before is not None and before_id is not None:
+        # O primeiro termo mantém a busca pelo índice em inicio
+        query += " AND r.inicio <= ? AND (r.inicio, r.id) < (?, ?)"
+        params_pagina += [bound(conn, before), bound(conn, before), before_id]
+    elif before is not None:
+        query += " AND r.inicio < ?"
+        params_pagina.append(bound(conn, before))
     
-    # Verificar se há registros
-    if not registros:
-        print("Nenhum registro encontrado.")
-        conn.close()
+    query += " ORDER BY r.inicio DESC, r.id DESC"
+    
+    if limit is not None or offset:
+        # Na tabela, uma linha a mais indica se existe próxima página
+        limite_consulta = limit + 1 if limit is not None and formato == 'tabela' else limit
+        query += " LIMIT ? OFFSET ?"
+        params_pagina += [-1 if limite_consulta is None else limite_consulta, offset]
+    
+    if formato != 'tabela':
+        write_rows(formato, SHOW_COLUMNS, conn.execute(query, params_pagina))
         return
     
-    # Calcular total
-    total_segundos = 0
+    cursor = conn.cursor()
+    cursor.row_factory = Session.row_factory
+    cursor.execute(query, params_pagina)
     
-    print(f"\n{'EMPRESA':<20} {'INÍCIO':<20} {'FIM':<20} {'DURAÇÃO':<10}")
-    print("-" * 75)
+    exibidos = 0
+    ha_proxima = False
+    ultimo_inicio = ultimo_id = None
+    saida = sys.stdout
+    linhas = []
     
-    for reg in registros:
-        inicio = datetime.datetime.fromisoformat(reg['inicio'])
-        fim = datetime.datetime.fromisoformat(reg['fim'])
+    for session in cursor:
+        if exibidos == limit:
+            ha_proxima = True
+            break
+        
+        if not exibidos:
+            saida.write(f"\n{'EMPRESA':<20} {'INÍCIO':<20} {'FIM':<20} {'DURAÇÃO':<10}\n")
+            saida.write("-" * 75 + "\n")
         
-        duracao_formatada = format_duration(reg['duracao'])
-        total_segundos += reg['duracao']
+        inicio = f"{session.data_inicio} {session.hora_inicio}"
+        fim = f"{session.data_fim} {session.hora_fim}"
+        linhas.append(f"{session.empresa:<20} {inicio:<20} {fim:<20} {format_duration(session.duracao):<10}\n")
+        exibidos += 1
+        ultimo_inicio, ultimo_id = session.inicio, session.id
         
-        print(f"{reg['empresa']:<20} {inicio.strftime('%d/%m/%Y %H:%M:%S'):<20} {fim.strftime('%d/%m/%Y %H:%M:%S'):<20} {duracao_formatada:<10}")
+        if len(linhas) >= SHOW_WRITE_CHUNK:
+            saida.writelines(linhas)
+            saida.flush()
+            linhas.clear()
+    
+    saida.writelines(linhas)
+    
+    # Verificar se há registros
+    if not exibidos:
+        print("Nenhum registro encontrado.")
+        return
+    
+    total_registros, total_segundos = conn.execute(f"""
+        SELECT COUNT(*), COALESCE(SUM(r.duracao), 0)
+        FROM registros r
+        JOIN empresas e ON r.empresa_id = e.id
+        {where}
+    """, params).fetchone()
     
     print("-" * 75)
-    print(f"Total: {format_duration(total_segundos)}")
+    print(f"Total: {format_duration(total_segundos)} ({total_registros} registro(s))")
     
-    conn.close()
+    if ha_proxima:
+        print(f"Próxima página: --before {ultimo_inicio} --before-id {ultimo_id}")
 
 
 def get_active_session_info():
@@ -77,90 +165,140 @@ def get_active_session_info():
     # Duração até agora
     duracao = int((now - inicio).total_seconds())
     
-    conn = getConnection()
-    cursor = conn.cursor()
-    cursor.execute("SELECT nome FROM empresas WHERE id = ?", (empresa_id,))
-    nome_empresa = cursor.fetchone()[0]
-    conn.close()
-    
     return {
-        'empresa': nome_empresa,
+        'empresa': get_company_name(empresa_id),
         'inicio': inicio,
         'duracao': duracao
     }
 
 
-def get_current_status():
-    sessao_ativa = check_active_session()
-    if sessao_ativa:
-        registro_id, empresa_id, inicio_str = sessao_ativa
-        inicio = datetime.datetime.fromisoformat(inicio_str)
-        now = datetime.datetime.now()
-        
-        # Duração até agora
-        duracao = int((now - inicio).total_seconds())
-        duracao_formatada = format_duration(duracao)
-        
-        conn = getConnection()
-        cursor = conn.cursor()
-        cursor.execute("SELECT nome FROM empresas WHERE id = ?", (empresa_id,))
-        nome_empresa = cursor.fetchone()[0]
-        conn.close()
-        
-        print(f"Sessão ativa para: {nome_empresa}")
-        print(f"Iniciada em: {inicio.strftime('%d/%m/%Y %H:%M:%S')}")
-        print(f"Duração até agora: {duracao_formatada}")
+def get_current_status(formato='tabela'):
+    if formato != 'tabela':
+        write_status(formato)
+        return
+    
+    sessao = get_active_session_info()
+    if sessao:
+        print(f"Sessão ativa para: {sessao['empresa']}")
+        print(f"Iniciada em: {sessao['inicio'].strftime('%d/%m/%Y %H:%M:%S')}")
+        print(f"Duração até agora: {format_duration(sessao['duracao'])}")
         return
     print("Nenhuma sessão ativa no momento.")
 
-def calcular_saldo(empresa=None, meta_horas_diarias=8):
-    conn = getConnection()
-    conn.row_factory = sqlite3.Row
-    cursor = conn.cursor()
+def write_status(formato):
+    """Escrever o status em formato legível por máquina, com o início cru do banco"""
+    sessao_ativa = check_active_session()
+    if not sessao_ativa:
+        write_object(formato, STATUS_COLUMNS, (False, None, None, None))
+        return
+    
+    _, empresa_id, inicio = sessao_ativa
+    duracao = int((datetime.datetime.now() - datetime.datetime.fromisoformat(inicio)).total_seconds())
+    write_object(formato, STATUS_COLUMNS, (True, get_company_name(empresa_id), inicio, duracao))
 
-    query = """
-    SELECT date(r.inicio) as data, sum(r.duracao) as segundos_trabalhados
-    FROM registros r
-    JOIN empresas e ON r.empresa_id = e.id
-    WHERE r.fim IS NOT NULL
+# Expressão SQL que identifica o período de cada dia no agrupamento do saldo
+PERIODOS_SALDO = {
+    'dia': "dia",
+    'semana': "date(dia, 'weekday 0', '-6 days')",  # segunda-feira da semana
+    'mes': "strftime('%Y-%m', dia)",
+}
+
+def calcular_saldo(empresa=None, meta_horas_diarias=8, data_inicio=None, data_fim=None, agrupar='dia'):
     """
-    params = []
+    Mostrar o saldo de horas em relação à meta diária, por dia, semana ou mês.
+
+    O período vai do primeiro dia com registros (ou da data inicial, se
+    posterior) até a data final ou hoje. A meta segue a regra de
+    dailyTotals.daily_target: só dias úteis, sem a meta de hoje (ainda em
+    andamento) e, com filtro de empresa, apenas nos dias com registros dela;
+    sem filtro, dias úteis sem registros contam a meta inteira. Fins de semana
+    sem trabalho são omitidos. Tudo é calculado em uma única consulta sobre
+    totais_diarios, com o saldo acumulado via função de janela.
+    """
+    try:
+        limite_inicio, limite_fim = day_range(data_inicio, data_fim)
+    except ValueError as e:
+        print(f"Erro: {e}")
+        return
+    
+    conn = getConnection()
+    hoje = datetime.date.today()
+    filtro_empresa = ""
+    params = {
+        'inicio_saldo': balance_start(conn, limite_inicio, empresa),
+        'fim': limite_fim or (hoje + datetime.timedelta(days=1)).isoformat(),
+        'hoje': hoje.isoformat(),
+        'por_empresa': bool(empresa),
+        'meta': int(meta_horas_diarias * 3600),
+    }
     if empresa:
-        query += " AND e.nome LIKE ?"
-        params.append(f"%{empresa}%")
+        filtro_empresa = "AND e.nome LIKE :empresa"
+        params['empresa'] = f"%{empresa}%"
     
-    query += " GROUP BY date(r.inicio) ORDER BY date(r.inicio)"
+    query = f"""
+    WITH RECURSIVE
+    dias(dia) AS (
+        SELECT :inicio_saldo WHERE :inicio_saldo < :fim
+        UNION ALL
+        SELECT date(dia, '+1 day') FROM dias WHERE date(dia, '+1 day') < :fim
+    ),
+    trabalho AS (
+        SELECT t.dia, SUM(t.segundos) AS segundos
+        FROM totais_diarios t
+        JOIN empresas e ON t.empresa_id = e.id
+        WHERE t.dia >= :inicio_saldo
+          AND t.dia < :fim
+          {filtro_empresa}
+        GROUP BY t.dia
+    ),
+    diario AS (
+        SELECT
+            d.dia,
+            COALESCE(w.segundos, 0) AS trabalhado,
+            {daily_target_sql('d.dia', 'COALESCE(w.segundos, 0)')} AS meta
+        FROM dias d
+        LEFT JOIN trabalho w ON w.dia = d.dia
+    ),
+    periodos AS (
+        SELECT {PERIODOS_SALDO[agrupar]} AS periodo, SUM(trabalhado) AS trabalhado, SUM(meta) AS meta
+        FROM diario
+        WHERE meta > 0 OR trabalhado > 0
+        GROUP BY periodo
+    )
+    SELECT
+        periodo,
+        trabalhado,
+        meta,
+        trabalhado - meta AS saldo,
+        SUM(trabalhado - meta) OVER (ORDER BY periodo) AS acumulado
+    FROM periodos
+    ORDER BY periodo
+    """
     
+    cursor = conn.cursor()
+    cursor.row_factory = sqlite3.Row
     cursor.execute(query, params)
-    dias = cursor.fetchall()
+    periodos = cursor.fetchall()
     
-    if not dias:
+    if not periodos:
         print("Nenhum registro encontrado para calcular saldo.")
-        conn.close()
         return
     
-    meta_segundos = meta_horas_diarias * 3600
+    titulo = {'dia': 'DATA', 'semana': 'SEMANA', 'mes': 'MÊS'}[agrupar]
+    print(f"\n{titulo:<15} {'HORAS TRAB.':<15} {'META':<15} {'SALDO':<15} {'ACUMULADO':<15}")
+    print("-" * 75)
     
     total_segundos_trabalhados = 0
     total_segundos_meta = 0
     
-    print(f"\n{'DATA':<15} {'HORAS TRAB.':<15} {'META':<15} {'SALDO':<15}")
-    print("-" * 60)
-    
-    for dia in dias:
-        data = dia['data']
-        segundos_trabalhados = dia['segundos_trabalhados']
+    for periodo in periodos:
+        total_segundos_trabalhados += periodo['trabalhado']
+        total_segundos_meta += periodo['meta']
         
-        saldo_dia = segundos_trabalhados - meta_segundos
-        
-        total_segundos_trabalhados += segundos_trabalhados
-        total_segundos_meta += meta_segundos
-        
-        print(f"{data:<15} {format_duration(segundos_trabalhados):<15} {format_duration(meta_segundos):<15} {format_duration(saldo_dia):<15}")
+        print(f"{periodo['periodo']:<15} {format_duration(periodo['trabalhado']):<15} {format_duration(periodo['meta']):<15} "
+              f"{format_balance(periodo['saldo']):<15} {format_balance(periodo['acumulado']):<15}")
     
     saldo_total = total_segundos_trabalhados - total_segundos_meta
     
-    print("-" * 60)
-    print(f"Total: {format_duration(total_segundos_trabalhados):<15} {format_duration(total_segundos_meta):<15} {format_duration(saldo_total):<15}")
-    
-    conn.close()
\ No newline at end of file
+    print("-" * 75)
+    print(f"{'Total:':<15} {format_duration(total_segundos_trabalhados):<15} {format_duration(total_segundos_meta):<15} {format_balance(saldo_total):<15}")
@@ -1,36 +1,165 @@
+from contextlib import contextmanager
 from pathlib import Path
+import atexit
+import os
 import sqlite3
+import sys
+import threading
+
+from services.migrations import SCHEMA_VERSION, get_schema_version, migrate
+from services.timeStorage import invalidate_storage_format
 
 
 DB_PATH = Path.home() / ".timetracker.db"
 
+# Conexões somente leitura (ex.: processos de exportação em lote)
+READ_ONLY = False
+
+# Modo de journal do banco. WAL permite leitores concorrentes com um escritor,
+# mas não funciona em sistemas de arquivos de rede (o índice em memória
+# compartilhada não é visível entre máquinas), onde o banco pode estar quando
+# a pasta pessoal é montada pela rede. Por isso o padrão é TRUNCATE; em disco
+# local, TIMETRACKER_JOURNAL_MODE=WAL ativa o WAL.
+JOURNAL_MODES = ('DELETE', 'TRUNCATE', 'PERSIST', 'WAL')
+JOURNAL_MODE_PADRAO = 'TRUNCATE'
+
+# Bytes do banco mapeados em memória (mmap também é arriscado em sistemas de
+# arquivos de rede): 256 MiB com WAL, desativado nos demais modos, a menos que
+# TIMETRACKER_MMAP_SIZE seja informado
+MMAP_SIZE_WAL = 268435456
+
+
+def _journal_mode():
+    modo = os.environ.get('TIMETRACKER_JOURNAL_MODE', JOURNAL_MODE_PADRAO).strip().upper()
+    if modo not in JOURNAL_MODES:
+        print(f"Aviso: TIMETRACKER_JOURNAL_MODE inválido '{modo}' (use {', '.join(JOURNAL_MODES)}); "
+              f"usando {JOURNAL_MODE_PADRAO}", file=sys.stderr)
+        return JOURNAL_MODE_PADRAO
+    return modo
+
+def _mmap_size(journal_mode):
+    padrao = MMAP_SIZE_WAL if journal_mode == 'WAL' else 0
+    valor = os.environ.get('TIMETRACKER_MMAP_SIZE')
+    if valor is None:
+        return padrao
+    try:
+        return max(0, int(valor))
+    except ValueError:
+        print(f"Aviso: TIMETRACKER_MMAP_SIZE inválido '{valor}'; usando {padrao}", file=sys.stderr)
+        return padrao
+
+JOURNAL_MODE = _journal_mode()
+
+# Pragmas aplicados a cada conexão aberta
+PRAGMAS = (
+    f"PRAGMA journal_mode = {JOURNAL_MODE}",
+    # NORMAL só é seguro contra queda de energia com WAL; nos demais modos, FULL
+    f"PRAGMA synchronous = {'NORMAL' if JOURNAL_MODE == 'WAL' else 'FULL'}",
+    "PRAGMA cache_size = -16000",      # ~16 MiB de cache de páginas
+    f"PRAGMA mmap_size = {_mmap_size(JOURNAL_MODE)}",
+    "PRAGMA busy_timeout = 5000",
+)
+
+# Uma conexão de longa duração por thread; guardamos também o pid para não
+# reaproveitar em um processo filho uma conexão herdada via fork.
+_local = threading.local()
+_connections = []
+_lock = threading.Lock()
+
+
+def _connect():
+    # isolation_level=None: sem transações implícitas, toda escrita deve usar transaction()
+    if READ_ONLY:
+        conn = sqlite3.connect(f"{DB_PATH.as_uri()}?mode=ro", uri=True, isolation_level=None, check_same_thread=False)
+    else:
+        conn = sqlite3.connect(DB_PATH, isolation_level=None, check_same_thread=False)
+    for pragma in PRAGMAS:
+        conn.execute(pragma)
+    return conn
+
 def getConnection():
-    return sqlite3.connect(DB_PATH)
+    """Obter a conexão compartilhada da thread atual, abrindo-a na primeira chamada"""
+    conn = getattr(_local, "conn", None)
+    if conn is None or _local.pid != os.getpid():
+        conn = _connect()
+        _local.conn = conn
+        _local.pid = os.getpid()
+        with _lock:
+            _connections.append((os.getpid(), conn))
+    return conn
 
-def setup_database():
-    """Configurar o banco de dados se não existir"""
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    
-    # Criar tabela de empresas
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS empresas (
-        id INTEGER PRIMARY KEY,
-        nome TEXT UNIQUE
-    )
-    ''')
-    
-    # Criar tabela de registros
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS registros (
-        id INTEGER PRIMARY KEY,
-        empresa_id INTEGER,
-        inicio TIMESTAMP,
-        fim TIMESTAMP,
-        duracao INTEGER,
-        FOREIGN KEY (empresa_id) REFERENCES empresas (id)
-    )
-    ''')
-    
+@atexit.register
+def close_connections():
+    """Fechar todas as conexões abertas por este processo"""
+    with _lock:
+        for pid, conn in _connections:
+            if pid == os.getpid():
+                conn.close()
+        _connections.clear()
+    _local.__dict__.clear()
+
+@contextmanager
+def transaction(modo="DEFERRED"):
+    """
+    Executar um bloco dentro de uma transação na conexão compartilhada.
+
+    Faz commit ao final do bloco e rollback se uma exceção for levantada.
+    Transações aninhadas são incorporadas à transação externa.
+    """
+    conn = getConnection()
+    if conn.in_transaction:
+        yield conn
+        return
+
+    conn.execute(f"BEGIN {modo}")
+    try:
+        yield conn
+    except BaseException:
+        conn.rollback()
+        raise
     conn.commit()
-    conn.close()
\ No newline at end of file
+
+def set_database_path(caminho, somente_leitura=False):
+    """Usar outro arquivo de banco (ex.: seed e benchmarks), fechando as conexões abertas"""
+    global DB_PATH, READ_ONLY
+    close_connections()
+    invalidate_storage_format()
+    DB_PATH = Path(caminho).resolve()
+    READ_ONLY = somente_leitura
+
+@contextmanager
+def deferred_indexes(conn, tabela):
+    """
+    Remover os índices de `tabela` durante o bloco e recriá-los ao final.
+
+    Útil em cargas em massa: reconstruir um índice uma vez é bem mais barato
+    que mantê-lo a cada INSERT. Os índices são recriados mesmo se o bloco falhar.
+    """
+    indices = conn.execute(
+        "SELECT name, sql FROM sqlite_master WHERE type = 'index' AND tbl_name = ? AND sql IS NOT NULL",
+        (tabela,)
+    ).fetchall()
+    
+    for nome, _ in indices:
+        conn.execute(f'DROP INDEX "{nome}"')
+    try:
+        yield
+    finally:
+        for _, sql in indices:
+            conn.execute(sql)
+
+def get_data_version():
+    """
+    Valor de PRAGMA data_version da conexão da thread atual.
+
+    Muda sempre que outra conexão faz commit no banco, permitindo detectar
+    alterações sem reler as tabelas.
+    """
+    return getConnection().execute("PRAGMA data_version").fetchone()[0]
+
+def setup_database():
+    """Configurar o banco de dados, aplicando migrações apenas se o schema estiver desatualizado"""
+    conn = getConnection()
+
+    if get_schema_version(conn) < SCHEMA_VERSION:
+        migrate(conn)
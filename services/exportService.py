@@ -1,37 +1,149 @@
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import contextlib
 from datetime import datetime
-import importlib
+import io
 import sys
-from pathlib import Path
-from exporters.ExcelExporter import exportToExcel
-from exporters.HTMLExporter import exportToHTML
+import time
 
+from services import databaseConfig
+from services.timeStorage import bound, local_sql
+from utils.lazyImport import lazy_callable
+
+# O exportador (e suas dependências, como openpyxl) só é importado ao ser usado
 format_implementations = {
-    'xls': exportToExcel,
-    'html': exportToHTML,
+    'xls': lazy_callable('exporters.ExcelExporter', 'exportToExcel'),
+    'html': lazy_callable('exporters.HTMLExporter', 'exportToHTML'),
+    'csv': lazy_callable('exporters.CSVExporter', 'exportToCSV'),
+    'columnar': lazy_callable('exporters.ColumnarExporter', 'exportToColumnar'),
 }
 
-def export_data(formato, empresa, data=None):
+def parse_month(data):
+    """Converter MM/YY (ou MM/YYYY) no primeiro dia do mês"""
+    try:
+        month, year = map(int, data.split('/'))
+        year = 2000 + year if year < 100 else year
+        return datetime(year, month, 1)
+    except (ValueError, TypeError):
+        raise ValueError("Formato de data inválido. Use MM/YY (ex: 02/25)")
+
+def parse_month_range(texto):
+    """Converter 'MM/YY..MM/YY' (ou um único MM/YY) na lista de meses do intervalo, inclusiva"""
+    inicio_texto, _, fim_texto = texto.partition('..')
+    inicio = parse_month(inicio_texto)
+    fim = parse_month(fim_texto) if fim_texto else inicio
+    if fim < inicio:
+        raise ValueError(f"Intervalo de meses inválido: '{texto}'")
+
+    meses = []
+    while inicio <= fim:
+        meses.append(inicio)
+        inicio = inicio.replace(year=inicio.year + inicio.month // 12, month=inicio.month % 12 + 1)
+    return meses
+
+def export_data(formato, empresa=None, data=None, todas=False, meses=None, processos=None):
     if formato not in format_implementations:
         supported_formats = ', '.join(format_implementations.keys())
         raise ValueError(f"Formato '{formato}' não suportado. Formatos disponíveis: {supported_formats}")
-    
+
     try:
-        date_obj = None
-        if data:
-            try:
-                month, year = map(int, data.split('/'))
-                year = 2000 + year if year < 100 else year
-                date_obj = datetime(year, month, 1)
-            except (ValueError, TypeError):
-                raise ValueError("Formato de data inválido. Use MM/YY (ex: 02/25)")
-        
+        if todas or meses:
+            if todas and empresa:
+                raise ValueError("Informe uma empresa ou --all, não ambos")
+            if data:
+                raise ValueError("Use --months para escolher os meses de uma exportação em lote")
+            return export_batch(formato, None if todas else empresa, meses, processos)
+
+        if not empresa:
+            raise ValueError("Informe a empresa ou use --all")
+
+        date_obj = parse_month(data) if data else None
+
         export_function = format_implementations[formato]
         return export_function(empresa, date_obj)
-        
+
     except Exception as e:
         print(f"Erro ao exportar: {e}", file=sys.stderr)
         return False
 
 
+def _init_export_worker(caminho_banco):
+    """Inicializador dos processos de exportação: conexão somente leitura com o mesmo banco"""
+    databaseConfig.set_database_path(caminho_banco, somente_leitura=True)
+
+def _export_job(formato, empresa, date_obj):
+    """Exportar uma empresa em um mês, retornando (sucesso, última mensagem do exportador)"""
+    with contextlib.redirect_stdout(io.StringIO()) as saida:
+        try:
+            sucesso = format_implementations[formato](empresa, date_obj)
+        except Exception as e:
+            print(f"Erro ao exportar: {e}")
+            sucesso = False
+    linhas = saida.getvalue().strip().splitlines()
+    return sucesso, linhas[-1] if linhas else ""
+
+def _batch_jobs(empresa, meses):
+    """Pares (empresa, mês) com registros no período, em uma única consulta"""
+    inicio = meses[0].strftime('%Y-%m-01')
+    ultimo = meses[-1]
+    fim = ultimo.replace(year=ultimo.year + ultimo.month // 12, month=ultimo.month % 12 + 1).strftime('%Y-%m-01')
+
+    conn = databaseConfig.getConnection()
+    query = f"""
+        SELECT DISTINCT e.nome, substr({local_sql(conn, 'r.inicio')}, 1, 7)
+        FROM registros r
+        JOIN empresas e ON r.empresa_id = e.id
+        WHERE r.inicio >= ? AND r.inicio < ?
+    """
+    params = [bound(conn, inicio), bound(conn, fim)]
+    if empresa:
+        query += " AND e.nome = ?"
+        params.append(empresa)
+    query += " ORDER BY 1, 2"
+
+    return [(nome, datetime.strptime(mes, '%Y-%m')) for nome, mes in conn.execute(query, params)]
+
+def export_batch(formato, empresa=None, meses=None, processos=None):
+    """
+    Exportar várias combinações empresa x mês em paralelo.
+
+    Sem `empresa`, exporta todas as empresas; sem `meses` ('MM/YY..MM/YY'),
+    o mês atual. Apenas combinações com registros geram arquivo. Os jobs são
+    distribuídos em um ProcessPoolExecutor cujos processos abrem conexões
+    somente leitura com o banco e importam o exportador uma única vez.
+    """
+    lista_meses = parse_month_range(meses) if meses else [datetime.now().replace(day=1, hour=0, minute=0, second=0, microsecond=0)]
+    jobs = _batch_jobs(empresa, lista_meses)
+
+    if not jobs:
+        print("Nenhum registro encontrado no período.")
+        return False
+
+    total = len(jobs)
+    falhas = []
+    inicio = time.perf_counter()
+
+    with ProcessPoolExecutor(max_workers=processos, initializer=_init_export_worker,
+                             initargs=(str(databaseConfig.DB_PATH),)) as executor:
+        futuros = {
+            executor.submit(_export_job, formato, nome, date_obj): (nome, date_obj)
+            for nome, date_obj in jobs
+        }
+
+        for concluidos, futuro in enumerate(as_completed(futuros), 1):
+            nome, date_obj = futuros[futuro]
+            sucesso, mensagem = futuro.result()
+            if not sucesso:
+                falhas.append((nome, date_obj, mensagem))
+            situacao = "ok" if sucesso else "falhou"
+            print(f"[{concluidos}/{total}] {nome} {date_obj.strftime('%m/%Y')}: {situacao}", flush=True)
+
+    for nome, date_obj, mensagem in falhas:
+        print(f"  {nome} {date_obj.strftime('%m/%Y')}: {mensagem}", file=sys.stderr)
+
+    print(f"Exportados {total - len(falhas)} de {total} relatório(s) em {time.perf_counter() - inicio:.1f}s"
+          + (f" ({len(falhas)} falha(s))" if falhas else ""))
+    return not falhas
+
+
 if __name__ == "__main__":
-    pass
\ No newline at end of file
+    pass
@@ -0,0 +1,289 @@
+import csv
+import datetime
+import json
+import os
+import time
+
+from services.companyService import invalidate_company_cache
+from services.dailyTotals import add_table_to_daily_totals
+from services.databaseConfig import deferred_indexes, getConnection, transaction
+from services.timeStorage import local_sql, session_encoder
+
+
+# Registros lidos do arquivo antes de cada executemany
+TAMANHO_LOTE = 50000
+
+# Os índices de registros só são removidos durante a carga quando a importação
+# é grande em relação à tabela; caso contrário, mantê-los custa menos que recriá-los
+FRACAO_ADIAR_INDICES = 0.25
+
+# Quantidade máxima de erros listados antes de abortar
+MAX_ERROS_EXIBIDOS = 10
+
+FORMATOS_IMPORTACAO = {
+    '.csv': 'csv',
+    '.tsv': 'tsv',
+    '.ndjson': 'ndjson',
+    '.jsonl': 'ndjson',
+}
+
+
+class ImportacaoInvalida(ValueError):
+    """Arquivo com linhas inválidas ou sessões sobrepostas; nada é importado"""
+
+    def __init__(self, mensagem, erros):
+        super().__init__(mensagem)
+        self.erros = erros
+
+
+def _ler_linhas(caminho, formato):
+    """Gerar (número da linha, dicionário) do arquivo, sem carregá-lo em memória"""
+    with open(caminho, encoding='utf-8-sig', newline='') as f:
+        if formato in ('csv', 'tsv'):
+            leitor = csv.DictReader(f, delimiter='\t' if formato == 'tsv' else ',')
+            for linha in leitor:
+                yield leitor.line_num, linha
+        else:
+            for numero, texto in enumerate(f, 1):
+                if texto.strip():
+                    try:
+                        yield numero, json.loads(texto)
+                    except json.JSONDecodeError as e:
+                        yield numero, e
+
+def _parse_timestamp(valor):
+    """Normalizar um timestamp ISO para o formato gravado pelo timetracker (horário local, sem fuso)"""
+    dt = datetime.datetime.fromisoformat(str(valor).strip())
+    if dt.tzinfo is not None:
+        dt = dt.astimezone().replace(tzinfo=None)
+    return dt
+
+def _parse_linha(linha, codificar):
+    """
+    Converter uma linha do arquivo em (empresa, inicio, fim, duracao, utc_offset), com os
+    timestamps no formato gravado, levantando ValueError se inválida
+    """
+    if not isinstance(linha, dict):
+        raise ValueError(f"linha inválida ({linha})")
+
+    empresa = (linha.get('empresa') or '').strip()
+    if not empresa:
+        raise ValueError("empresa não informada")
+
+    try:
+        inicio = _parse_timestamp(linha['inicio'])
+        fim = _parse_timestamp(linha['fim'])
+    except (KeyError, TypeError, ValueError):
+        raise ValueError("inicio e fim devem ser timestamps ISO (YYYY-MM-DDTHH:MM:SS)")
+
+    if fim <= inicio:
+        raise ValueError("fim deve ser posterior ao início")
+
+    duracao = linha.get('duracao')
+    if duracao in (None, ''):
+        duracao = round((fim - inicio).total_seconds())
+    else:
+        try:
+            duracao = int(duracao)
+        except (TypeError, ValueError):
+            raise ValueError("duracao deve ser um número inteiro de segundos")
+        # A duração deve corresponder ao intervalo (truncado ou arredondado): os totais
+        # diários a usam para fechar a última parte de sessões que passam da meia-noite
+        if abs(duracao - (fim - inicio).total_seconds()) >= 1:
+            raise ValueError("duracao não corresponde ao intervalo entre inicio e fim")
+
+    inicio, fim, utc_offset = codificar(inicio, fim)
+    return empresa, inicio, fim, duracao, utc_offset
+
+def _resolver_empresas(conn, mapa, nomes):
+    """Completar `mapa` (nome -> id) com `nomes`, criando as empresas que faltam em lote"""
+    novos = [nome for nome in nomes if nome not in mapa]
+    if not novos:
+        return
+
+    conn.executemany(
+        "INSERT INTO empresas (nome) VALUES (?) ON CONFLICT (nome) DO NOTHING",
+        ((nome,) for nome in novos)
+    )
+    # Limite de variáveis por consulta do SQLite
+    for i in range(0, len(novos), 500):
+        parte = novos[i:i + 500]
+        marcadores = ", ".join("?" * len(parte))
+        for empresa_id, nome in conn.execute(f"SELECT id, nome FROM empresas WHERE nome IN ({marcadores})", parte):
+            mapa[nome] = empresa_id
+
+def _carregar_staging(conn, caminho, formato, tamanho_lote):
+    """Ler o arquivo para a tabela temporária importacao, retornando (linhas lidas, erros)"""
+    mapa = dict(conn.execute("SELECT nome, id FROM empresas"))
+    codificar = session_encoder(conn)
+    erros = []
+    total = 0
+    lote = []
+
+    def gravar():
+        _resolver_empresas(conn, mapa, {empresa for empresa, *_ in lote})
+        conn.executemany(
+            "INSERT INTO temp.importacao (empresa_id, inicio, fim, duracao, utc_offset, linha) VALUES (?, ?, ?, ?, ?, ?)",
+            ((mapa[empresa], *valores, numero) for empresa, *valores, numero in lote)
+        )
+        lote.clear()
+
+    for numero, linha in _ler_linhas(caminho, formato):
+        try:
+            registro = _parse_linha(linha, codificar)
+        except ValueError as e:
+            if len(erros) < MAX_ERROS_EXIBIDOS:
+                erros.append(f"linha {numero}: {e}")
+            continue
+
+        total += 1
+        # Após o primeiro erro a importação será abortada: apenas validar o restante
+        if erros:
+            continue
+        lote.append((*registro, numero))
+        if len(lote) >= tamanho_lote:
+            gravar()
+
+    if lote and not erros:
+        gravar()
+
+    return total, erros
+
+def _sobreposicoes(conn):
+    """Sessões sobrepostas entre si no arquivo ou com registros já existentes"""
+    # Dentro do arquivo: ordenadas por início, cada sessão deve começar após o fim da anterior
+    erros = [
+        f"linha {linha}: sobrepõe a sessão da linha {linha_anterior} ({inicio} a {fim})"
+        for linha, inicio, fim, linha_anterior in conn.execute(f"""
+            SELECT linha, {local_sql(conn, 'inicio')}, {local_sql(conn, 'fim')}, linha_anterior FROM (
+                SELECT linha, inicio, fim, utc_offset,
+                       LAG(fim) OVER (ORDER BY inicio) AS fim_anterior,
+                       LAG(linha) OVER (ORDER BY inicio) AS linha_anterior
+                FROM temp.importacao
+            )
+            WHERE fim_anterior > inicio
+            ORDER BY linha
+            LIMIT {MAX_ERROS_EXIBIDOS}
+        """)
+    ]
+
+    # Com o banco: os registros existentes podem se sobrepor entre si, então cada sessão
+    # importada é comparada com o maior fim entre os registros iniciados antes dela e
+    # com o próximo registro existente. Registros anteriores ao período do arquivo são
+    # resumidos em uma linha (seu maior fim); a sessão ativa é verificada à parte
+    periodo_inicio, periodo_fim = conn.execute(
+        "SELECT MIN(inicio), MAX(fim) FROM temp.importacao"
+    ).fetchone()
+    sessao_ativa = conn.execute("SELECT inicio FROM registros WHERE fim IS NULL").fetchone()
+    erros += [
+        f"linha {linha}: sobrepõe registro(s) existente(s) ({inicio} a {fim})"
+        for linha, inicio, fim in conn.execute(f"""
+            WITH sessoes AS (
+                SELECT :inicio AS inicio,
+                       (SELECT MAX(fim) FROM registros WHERE inicio < :inicio) AS fim,
+                       0 AS utc_offset, NULL AS linha
+                UNION ALL
+                SELECT inicio, fim, utc_offset, NULL
+                FROM registros
+                WHERE inicio >= :inicio AND inicio < :fim
+                UNION ALL
+                SELECT inicio, fim, utc_offset, linha FROM temp.importacao
+            )
+            SELECT linha, {local_sql(conn, 'inicio')}, {local_sql(conn, 'fim')} FROM (
+                SELECT linha, inicio, fim, utc_offset,
+                       MAX(CASE WHEN linha IS NULL THEN fim END) OVER (
+                           ORDER BY inicio, linha IS NOT NULL
+                           ROWS BETWEEN UNBOUNDED PRECEDING AND 1 PRECEDING
+                       ) AS fim_existente,
+                       MIN(CASE WHEN linha IS NULL THEN inicio END) OVER (
+                           ORDER BY inicio, linha IS NOT NULL
+                           ROWS BETWEEN 1 FOLLOWING AND UNBOUNDED FOLLOWING
+                       ) AS proximo_existente
+                FROM sessoes
+            ) AS s
+            WHERE linha IS NOT NULL
+              AND (fim_existente > inicio
+                   OR proximo_existente < fim
+                   OR fim > :inicio_ativa)
+            ORDER BY linha
+            LIMIT {MAX_ERROS_EXIBIDOS}
+        """, {'inicio': periodo_inicio, 'fim': periodo_fim, 'inicio_ativa': sessao_ativa and sessao_ativa[0]})
+    ]
+    return erros
+
+def import_sessions(caminho, formato=None, tamanho_lote=TAMANHO_LOTE):
+    """
+    Importar sessões finalizadas de um arquivo CSV, TSV ou NDJSON.
+
+    Cada linha traz empresa, inicio e fim (ISO) e, opcionalmente, duracao em
+    segundos (calculada a partir do intervalo quando ausente) — o mesmo
+    formato de `show --format`. Empresas são resolvidas por um mapa em
+    memória e as novas são criadas em lote. Tudo roda em uma transação:
+    as linhas passam por uma tabela temporária, são validadas (formato e
+    sobreposições, no arquivo e com o banco) e só então copiadas para
+    registros. Qualquer erro levanta ImportacaoInvalida sem importar nada.
+    Retorna a quantidade de sessões importadas.
+    """
+    conn = getConnection()
+
+    with transaction("IMMEDIATE"):
+        conn.execute("""
+            CREATE TEMP TABLE importacao (
+                empresa_id INTEGER NOT NULL,
+                inicio TIMESTAMP NOT NULL,
+                fim TIMESTAMP NOT NULL,
+                duracao INTEGER NOT NULL,
+                utc_offset INTEGER NOT NULL,
+                linha INTEGER NOT NULL
+            )
+        """)
+        try:
+            total, erros = _carregar_staging(conn, caminho, formato, tamanho_lote)
+            if erros:
+                raise ImportacaoInvalida("Linhas inválidas no arquivo", erros)
+            if not total:
+                return 0
+
+            conn.execute("CREATE INDEX temp.idx_importacao_inicio ON importacao (inicio)")
+            erros = _sobreposicoes(conn)
+            if erros:
+                raise ImportacaoInvalida("Sessões sobrepostas", erros)
+
+            existentes = conn.execute("SELECT COUNT(*) FROM registros").fetchone()[0]
+            copiar = """
+                INSERT INTO registros (empresa_id, inicio, fim, duracao, utc_offset)
+                SELECT empresa_id, inicio, fim, duracao, utc_offset FROM temp.importacao ORDER BY inicio
+            """
+            if total >= existentes * FRACAO_ADIAR_INDICES:
+                with deferred_indexes(conn, "registros"):
+                    conn.execute(copiar)
+            else:
+                conn.execute(copiar)
+
+            add_table_to_daily_totals(conn, "temp.importacao")
+            return total
+        finally:
+            invalidate_company_cache()
+            conn.execute("DROP TABLE temp.importacao")
+
+def import_file(caminho, formato=None, tamanho_lote=TAMANHO_LOTE):
+    """Comando import: importar o arquivo e mostrar o resultado"""
+    if formato is None:
+        formato = FORMATOS_IMPORTACAO.get(os.path.splitext(caminho)[1].lower())
+        if formato is None:
+            print(f"Erro: Não foi possível identificar o formato de '{caminho}'. Use --format (csv, tsv ou ndjson)")
+            return
+
+    inicio = time.perf_counter()
+    try:
+        total = import_sessions(caminho, formato, tamanho_lote)
+    except OSError as e:
+        print(f"Erro: {e}")
+        return
+    except ImportacaoInvalida as e:
+        print(f"Erro: {e}. Nenhum registro foi importado.")
+        for erro in e.erros:
+            print(f"  {erro}")
+        return
+
+    print(f"{total} sessão(ões) importada(s) em {time.perf_counter() - inicio:.1f}s")
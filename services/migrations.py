@@ -0,0 +1,126 @@
+import sys
+
+from services.dailyTotals import rebuild_daily_totals
+
+
+def close_duplicate_active_sessions(conn):
+    """
+    Encerrar sessões ativas duplicadas (várias linhas com fim NULL, criadas
+    por starts concorrentes antes do índice único da migração 3).
+
+    A sessão ativa mais recente é mantida; as demais são encerradas com
+    duração zero (fim = inicio), para não inventar horas trabalhadas, e
+    listadas no stderr para que o usuário as corrija.
+    """
+    encerradas = conn.execute("""
+        UPDATE registros
+        SET fim = inicio, duracao = 0
+        WHERE fim IS NULL
+          AND id != (
+              SELECT id FROM registros WHERE fim IS NULL ORDER BY inicio DESC, id DESC LIMIT 1
+          )
+        RETURNING id, inicio
+    """).fetchall()
+    if encerradas:
+        print(f"Aviso: {len(encerradas)} sessão(ões) ativa(s) duplicada(s) encerrada(s) com duração zero; "
+              "corrija o fim destes registros se necessário:", file=sys.stderr)
+        for registro_id, inicio in sorted(encerradas, key=lambda registro: registro[1]):
+            print(f"  registro {registro_id} iniciado em {inicio}", file=sys.stderr)
+
+
+# Cada migração é uma lista de passos aplicados em ordem: comandos SQL ou
+# funções que recebem a conexão. A posição na lista define a versão do schema
+# (gravada em PRAGMA user_version), portanto migrações já publicadas nunca
+# devem ser alteradas, apenas acrescentadas.
+MIGRATIONS = [
+    # 1: tabelas iniciais
+    [
+        '''
+        CREATE TABLE IF NOT EXISTS empresas (
+            id INTEGER PRIMARY KEY,
+            nome TEXT UNIQUE
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS registros (
+            id INTEGER PRIMARY KEY,
+            empresa_id INTEGER,
+            inicio TIMESTAMP,
+            fim TIMESTAMP,
+            duracao INTEGER,
+            FOREIGN KEY (empresa_id) REFERENCES empresas (id)
+        )
+        ''',
+    ],
+    # 2: índices para consultas por empresa, por período e da sessão ativa
+    [
+        "CREATE INDEX IF NOT EXISTS idx_registros_empresa_inicio ON registros (empresa_id, inicio)",
+        "CREATE INDEX IF NOT EXISTS idx_registros_inicio ON registros (inicio)",
+        "CREATE INDEX IF NOT EXISTS idx_registros_ativos ON registros (empresa_id, inicio) WHERE fim IS NULL",
+    ],
+    # 3: no máximo uma sessão ativa (todas as linhas com fim NULL indexam o mesmo valor);
+    #    sessões ativas duplicadas de bancos antigos são encerradas antes
+    [
+        close_duplicate_active_sessions,
+        "CREATE UNIQUE INDEX IF NOT EXISTS idx_registros_sessao_unica ON registros ((fim IS NULL)) WHERE fim IS NULL",
+    ],
+    # 4: totais diários por empresa, mantidos pelo stop e usados por calendar e saldo
+    [
+        '''
+        CREATE TABLE IF NOT EXISTS totais_diarios (
+            dia TEXT NOT NULL,
+            empresa_id INTEGER NOT NULL,
+            segundos INTEGER NOT NULL,
+            sessoes INTEGER NOT NULL,
+            PRIMARY KEY (dia, empresa_id),
+            FOREIGN KEY (empresa_id) REFERENCES empresas (id)
+        ) WITHOUT ROWID
+        ''',
+        rebuild_daily_totals,
+    ],
+    # 5: recalcular totais dividindo sessões que atravessam a meia-noite
+    [
+        rebuild_daily_totals,
+    ],
+    # 6: configurações do banco (ex.: formato dos timestamps) e deslocamento UTC
+    #    usado pelo formato epoch (ver services/timeStorage.py)
+    [
+        '''
+        CREATE TABLE IF NOT EXISTS configuracoes (
+            chave TEXT PRIMARY KEY,
+            valor TEXT NOT NULL
+        ) WITHOUT ROWID
+        ''',
+        "ALTER TABLE registros ADD COLUMN utc_offset INTEGER NOT NULL DEFAULT 0",
+    ],
+]
+
+SCHEMA_VERSION = len(MIGRATIONS)
+
+
+def get_schema_version(conn):
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(conn):
+    """Aplicar as migrações pendentes, cada uma em sua própria transação"""
+    while get_schema_version(conn) < SCHEMA_VERSION:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Reler a versão já com o lock: outro processo pode ter migrado antes
+            versao = get_schema_version(conn)
+            if versao >= SCHEMA_VERSION:
+                conn.rollback()
+                break
+
+            for passo in MIGRATIONS[versao]:
+                if callable(passo):
+                    passo(conn)
+                else:
+                    conn.execute(passo)
+
+            conn.execute(f"PRAGMA user_version = {versao + 1}")
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
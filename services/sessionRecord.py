@@ -0,0 +1,97 @@
+"""
+Registro compacto de uma sessão de trabalho, decodificado uma vez por linha.
+
+Os campos derivados (datas e horas formatadas, minutos) são obtidos por
+fatiamento do texto ISO local devolvido pelas consultas (ver timeStorage),
+sem datetime.fromisoformat nem strftime, e guardados no próprio registro
+na primeira leitura.
+"""
+
+
+class _cached_slot:
+    """
+    Como functools.cached_property, mas guardando o valor em um slot
+    ('_' + nome) em vez de __dict__, que não existe com __slots__
+    """
+
+    def __init__(self, funcao):
+        self.funcao = funcao
+        self.slot = '_' + funcao.__name__
+        self.__doc__ = funcao.__doc__
+
+    def __get__(self, obj, tipo=None):
+        if obj is None:
+            return self
+        try:
+            return getattr(obj, self.slot)
+        except AttributeError:
+            valor = self.funcao(obj)
+            setattr(obj, self.slot, valor)
+            return valor
+
+
+class Session:
+    """
+    Sessão (id, inicio, fim, duracao, empresa) com inicio/fim em texto ISO
+    local ('YYYY-MM-DDTHH:MM:SS[.ffffff]'); fim e duracao são None enquanto a
+    sessão está ativa e empresa só vem preenchida quando a consulta a seleciona
+    """
+
+    __slots__ = (
+        'id', 'inicio', 'fim', 'duracao', 'empresa',
+        '_data_inicio', '_hora_inicio', '_data_inicio_iso',
+        '_data_fim', '_hora_fim', '_data_fim_iso',
+        '_duracao_minutos',
+    )
+
+    def __init__(self, id, inicio, fim, duracao, empresa=None):
+        self.id = id
+        self.inicio = inicio
+        self.fim = fim
+        self.duracao = duracao
+        self.empresa = empresa
+
+    def __repr__(self):
+        return f"Session(id={self.id!r}, inicio={self.inicio!r}, fim={self.fim!r}, duracao={self.duracao!r}, empresa={self.empresa!r})"
+
+    @classmethod
+    def row_factory(cls, cursor, row):
+        """row_factory do sqlite3 para consultas que selecionam (id, inicio, fim, duracao[, empresa])"""
+        return cls(*row)
+
+    @_cached_slot
+    def data_inicio(self):
+        """Data de início como DD/MM/YYYY"""
+        inicio = self.inicio
+        return f"{inicio[8:10]}/{inicio[5:7]}/{inicio[0:4]}"
+
+    @_cached_slot
+    def hora_inicio(self):
+        """Hora de início como HH:MM:SS"""
+        return self.inicio[11:19]
+
+    @_cached_slot
+    def data_inicio_iso(self):
+        """Data de início como YYYY-MM-DD"""
+        return self.inicio[0:10]
+
+    @_cached_slot
+    def data_fim(self):
+        """Data de fim como DD/MM/YYYY, ou None se a sessão está ativa"""
+        fim = self.fim
+        return f"{fim[8:10]}/{fim[5:7]}/{fim[0:4]}" if fim else None
+
+    @_cached_slot
+    def hora_fim(self):
+        """Hora de fim como HH:MM:SS, ou None se a sessão está ativa"""
+        return self.fim[11:19] if self.fim else None
+
+    @_cached_slot
+    def data_fim_iso(self):
+        """Data de fim como YYYY-MM-DD, ou None se a sessão está ativa"""
+        return self.fim[0:10] if self.fim else None
+
+    @_cached_slot
+    def duracao_minutos(self):
+        """Duração em minutos completos (0 se a sessão está ativa)"""
+        return self.duracao // 60 if self.duracao else 0
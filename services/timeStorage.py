@@ -0,0 +1,166 @@
+"""
+Camada de acesso aos timestamps de registros.inicio e registros.fim.
+
+Dois formatos de armazenamento são suportados, escolhidos por banco (tabela
+configuracoes, chave 'formato_tempo'):
+
+- 'iso' (padrão): texto ISO no horário local, 'YYYY-MM-DDTHH:MM:SS[.ffffff]'.
+- 'epoch': inteiro de segundos UTC desde 1970-01-01; registros.utc_offset
+  guarda o deslocamento (em segundos) do horário local no início da sessão.
+
+Consultas não devem usar as colunas diretamente: local_sql() devolve uma
+expressão com o horário local em texto ISO (o mesmo nos dois formatos), e
+encode_timestamp()/session_encoder()/bound() convertem valores do Python
+para o formato gravado. Assim comparações de intervalo usam a coluna crua
+(comparação de inteiros no formato epoch) e continuam usando os índices.
+
+O formato é lido uma vez e guardado em memória. Processos de longa duração
+(watch, calendar) devem chamar invalidate_storage_format() quando PRAGMA
+data_version mudar, pois outro processo pode ter convertido o banco.
+
+Limitação do formato epoch: há um único utc_offset por sessão, o do início.
+O fim local de uma sessão que atravessa uma mudança de horário de verão sai
+deslocado pela diferença (em geral uma hora); a duração não é afetada, pois
+é calculada pelos valores UTC, e a conversão de volta para ISO restaura o fim
+correto.
+
+Este módulo não importa databaseConfig: as funções recebem a conexão, para
+poderem ser usadas pelas migrações.
+"""
+
+import datetime
+
+FORMATO_ISO = 'iso'
+FORMATO_EPOCH = 'epoch'
+FORMATOS_ARMAZENAMENTO = (FORMATO_ISO, FORMATO_EPOCH)
+
+# Formato do banco atual, lido na primeira consulta
+_formato = None
+
+
+def storage_format(conn):
+    """Formato de armazenamento dos timestamps no banco da conexão"""
+    global _formato
+    if _formato is None:
+        existe = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'configuracoes'"
+        ).fetchone()
+        linha = existe and conn.execute(
+            "SELECT valor FROM configuracoes WHERE chave = 'formato_tempo'"
+        ).fetchone()
+        _formato = linha[0] if linha else FORMATO_ISO
+    return _formato
+
+def invalidate_storage_format():
+    """Descartar o formato lido (ex.: outro banco ou conversão feita por outro processo)"""
+    global _formato
+    _formato = None
+
+def local_sql(conn, coluna):
+    """
+    Expressão SQL com o valor de `coluna` (ex.: 'inicio' ou 'r.fim') como
+    texto ISO no horário local. O deslocamento é lido da coluna utc_offset da
+    mesma tabela (ou alias); para fim, é o do início da sessão (ver a
+    limitação de horário de verão no topo do módulo)
+    """
+    if storage_format(conn) == FORMATO_ISO:
+        return coluna
+    prefixo = coluna.rpartition('.')[0]
+    offset = f"{prefixo}.utc_offset" if prefixo else "utc_offset"
+    return f"strftime('%Y-%m-%dT%H:%M:%S', {coluna} + {offset}, 'unixepoch')"
+
+def local_epoch_sql(conn, coluna):
+    """Expressão SQL com o horário local de `coluna` em segundos inteiros desde 1970-01-01 (sem fuso)"""
+    if storage_format(conn) == FORMATO_EPOCH:
+        prefixo = coluna.rpartition('.')[0]
+        offset = f"{prefixo}.utc_offset" if prefixo else "utc_offset"
+        return f"({coluna} + {offset})"
+    return f"CAST(strftime('%s', {coluna}) AS INTEGER)"
+
+def local_epoch_us_sql(conn, coluna):
+    """
+    Expressão SQL com o horário local de `coluna` em microssegundos desde
+    1970-01-01 (sem fuso), calculada pelo SQLite; NULL continua NULL
+    """
+    if storage_format(conn) == FORMATO_EPOCH:
+        prefixo = coluna.rpartition('.')[0]
+        offset = f"{prefixo}.utc_offset" if prefixo else "utc_offset"
+        return f"({coluna} + {offset}) * 1000000"
+    return f"strftime('%s', {coluna}) * 1000000 + CAST(substr({coluna} || '.000000', 21, 6) AS INTEGER)"
+
+def duration_sql(conn, fim, inicio):
+    """Expressão SQL da duração em segundos (truncada) entre dois valores gravados"""
+    if storage_format(conn) == FORMATO_EPOCH:
+        return f"{fim} - {inicio}"
+    return f"CAST(ROUND((julianday({fim}) - julianday({inicio})) * 86400000) / 1000 AS INTEGER)"
+
+def _utc_offset(dt):
+    return int(dt.astimezone().utcoffset().total_seconds())
+
+def encode_timestamp(conn, dt):
+    """Converter um datetime local (sem fuso) para o formato gravado"""
+    if storage_format(conn) == FORMATO_EPOCH:
+        return int(dt.timestamp())
+    return dt.isoformat()
+
+def session_encoder(conn):
+    """
+    Função (inicio, fim) -> (inicio, fim, utc_offset) no formato gravado,
+    para datetimes locais sem fuso; fim pode ser None. Resolvida uma vez,
+    para uso em cargas com muitas linhas
+    """
+    if storage_format(conn) == FORMATO_EPOCH:
+        def codificar(inicio, fim):
+            return int(inicio.timestamp()), (int(fim.timestamp()) if fim else None), _utc_offset(inicio)
+    else:
+        def codificar(inicio, fim):
+            return inicio.isoformat(), (fim.isoformat() if fim else None), 0
+    return codificar
+
+def bound(conn, texto):
+    """Converter um limite ISO ('YYYY-MM-DD' ou data e hora local) para comparar com as colunas gravadas"""
+    if texto is None or storage_format(conn) == FORMATO_ISO:
+        return texto
+    return int(datetime.datetime.fromisoformat(texto).timestamp())
+
+def convert_storage(conn, formato):
+    """
+    Converter os timestamps de registros para `formato`, no lugar, e gravar a escolha.
+
+    Deve ser chamada dentro de uma transação. De ISO para epoch, o
+    deslocamento de cada sessão vem das regras de fuso do sistema (modificador
+    'utc' do SQLite) e frações de segundo são descartadas; de epoch para ISO,
+    o início local é reconstruído com utc_offset e o fim pelas regras de fuso
+    do sistema (modificador 'localtime'), como na ida, para que uma sessão que
+    atravessa o horário de verão volte ao valor original. Retorna a quantidade de
+    registros convertidos (0 se o banco já estiver no formato).
+    """
+    if formato not in FORMATOS_ARMAZENAMENTO:
+        raise ValueError(f"Formato de armazenamento desconhecido: '{formato}'")
+
+    invalidate_storage_format()
+    if storage_format(conn) == formato:
+        return 0
+
+    if formato == FORMATO_EPOCH:
+        cursor = conn.execute("""
+            UPDATE registros SET
+                utc_offset = CAST(strftime('%s', inicio) AS INTEGER) - CAST(strftime('%s', inicio, 'utc') AS INTEGER),
+                inicio = CAST(strftime('%s', inicio, 'utc') AS INTEGER),
+                fim = CAST(strftime('%s', fim, 'utc') AS INTEGER)
+        """)
+    else:
+        cursor = conn.execute("""
+            UPDATE registros SET
+                inicio = strftime('%Y-%m-%dT%H:%M:%S', inicio + utc_offset, 'unixepoch'),
+                fim = strftime('%Y-%m-%dT%H:%M:%S', fim, 'unixepoch', 'localtime'),
+                utc_offset = 0
+        """)
+
+    conn.execute(
+        "INSERT INTO configuracoes (chave, valor) VALUES ('formato_tempo', ?) "
+        "ON CONFLICT (chave) DO UPDATE SET valor = excluded.valor",
+        (formato,)
+    )
+    invalidate_storage_format()
+    return cursor.rowcount
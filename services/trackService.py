@@ -1,7 +1,12 @@
 
 import datetime
-from services.companyService import get_company_id
-from services.databaseConfig import getConnection
+import sqlite3
+
+from services.companyService import get_company_id, get_company_name, invalidate_company_cache
+from services.dailyTotals import add_session_to_daily_totals, rebuild_daily_totals
+from services.databaseConfig import deferred_indexes, getConnection, transaction
+from services.timeStorage import (FORMATO_EPOCH, FORMATO_ISO, convert_storage, duration_sql, encode_timestamp,
+                                  invalidate_storage_format, local_sql, session_encoder, storage_format)
 from utils.dateFormat import format_duration
 
 
@@ -10,11 +15,9 @@ def check_active_session():
     conn = getConnection()
     cursor = conn.cursor()
     
-    cursor.execute("SELECT id, empresa_id, inicio FROM registros WHERE fim IS NULL")
+    cursor.execute(f"SELECT id, empresa_id, {local_sql(conn, 'inicio')} FROM registros WHERE fim IS NULL")
     resultado = cursor.fetchone()
     
-    conn.close()
-    
     if resultado:
         return resultado
     return None
@@ -22,67 +25,69 @@ def check_active_session():
 
 def start_tracking(nome_empresa):
     """Iniciar rastreamento de tempo para uma empresa"""
-    # Verificar se já existe uma sessão ativa
-    sessao_ativa = check_active_session()
-    if sessao_ativa:
-        conn = getConnection()
-        cursor = conn.cursor()
-        cursor.execute("SELECT nome FROM empresas WHERE id = ?", (sessao_ativa[1],))
-        empresa = cursor.fetchone()[0]
-        conn.close()
-        
-        inicio = datetime.datetime.fromisoformat(sessao_ativa[2])
-        print(f"Erro: Já existe uma sessão ativa para '{empresa}' iniciada em {inicio.strftime('%d/%m/%Y %H:%M:%S')}")
-        print("Finalize a sessão atual com 'timetracker stop' antes de iniciar uma nova.")
-        return
-    
-    # Iniciar nova sessão
-    empresa_id = get_company_id(nome_empresa)
     now = datetime.datetime.now()
     
-    conn = getConnection()
-    cursor = conn.cursor()
-    
-    cursor.execute(
-        "INSERT INTO registros (empresa_id, inicio, fim, duracao) VALUES (?, ?, NULL, NULL)",
-        (empresa_id, now.isoformat())
-    )
-    
-    conn.commit()
-    conn.close()
+    # Duas tentativas: a sessão que impediu o INSERT pode ser finalizada por outro
+    # processo antes de ser consultada, e então o start pode prosseguir
+    for tentativa in range(2):
+        try:
+            # Empresa e sessão são criadas na mesma transação; o índice único parcial
+            # idx_registros_sessao_unica impede duas sessões ativas simultâneas
+            with transaction("IMMEDIATE") as conn:
+                empresa_id = get_company_id(nome_empresa)
+                inicio, _, utc_offset = session_encoder(conn)(now, None)
+                conn.execute(
+                    "INSERT INTO registros (empresa_id, inicio, fim, duracao, utc_offset) VALUES (?, ?, NULL, NULL, ?)",
+                    (empresa_id, inicio, utc_offset)
+                )
+            break
+        except sqlite3.IntegrityError:
+            # O rollback pode ter desfeito a criação da empresa que já está no cache
+            invalidate_company_cache()
+            
+            sessao_ativa = check_active_session()
+            if sessao_ativa is None:
+                if tentativa == 0:
+                    continue
+                print("Erro: Já existe uma sessão ativa.")
+                print("Finalize a sessão atual com 'timetracker stop' antes de iniciar uma nova.")
+                return
+            
+            _, empresa_id, inicio_str = sessao_ativa
+            empresa = get_company_name(empresa_id)
+            
+            inicio = datetime.datetime.fromisoformat(inicio_str)
+            print(f"Erro: Já existe uma sessão ativa para '{empresa}' iniciada em {inicio.strftime('%d/%m/%Y %H:%M:%S')}")
+            print("Finalize a sessão atual com 'timetracker stop' antes de iniciar uma nova.")
+            return
     
     print(f"Iniciando rastreamento para '{nome_empresa}' em {now.strftime('%d/%m/%Y %H:%M:%S')}")
 
 def stop_tracking():
     """Finalizar rastreamento de tempo ativo"""
-    sessao_ativa = check_active_session()
+    now = datetime.datetime.now()
     
-    if not sessao_ativa:
+    # Finalizar a sessão e calcular a duração (em segundos, truncada) em um único comando
+    with transaction("IMMEDIATE") as conn:
+        cursor = conn.execute(f"""
+            UPDATE registros
+            SET fim = :fim,
+                duracao = {duration_sql(conn, ':fim', 'inicio')}
+            WHERE fim IS NULL
+            RETURNING {local_sql(conn, 'inicio')}, {local_sql(conn, 'fim')}, duracao, empresa_id
+        """, {"fim": encode_timestamp(conn, now)})
+        resultado = cursor.fetchone()
+        
+        if resultado:
+            inicio_str, fim_str, duracao, empresa_id = resultado
+            add_session_to_daily_totals(conn, empresa_id, inicio_str, fim_str, duracao)
+    
+    if not resultado:
         print("Erro: Não há sessão ativa para finalizar.")
         return
     
-    registro_id, empresa_id, inicio_str = sessao_ativa
+    nome_empresa = get_company_name(empresa_id)
     inicio = datetime.datetime.fromisoformat(inicio_str)
-    now = datetime.datetime.now()
-    
-    # Calcular duração em segundos
-    duracao = int((now - inicio).total_seconds())
-    
-    conn = getConnection()
-    cursor = conn.cursor()
-    
-    # Atualizar registro
-    cursor.execute(
-        "UPDATE registros SET fim = ?, duracao = ? WHERE id = ?",
-        (now.isoformat(), duracao, registro_id)
-    )
-    
-    # Obter nome da empresa
-    cursor.execute("SELECT nome FROM empresas WHERE id = ?", (empresa_id,))
-    nome_empresa = cursor.fetchone()[0]
-    
-    conn.commit()
-    conn.close()
     
     # Formatar duração
     duracao_formatada = format_duration(duracao)
@@ -92,3 +97,36 @@ def stop_tracking():
     print(f"Finalizado em: {now.strftime('%d/%m/%Y %H:%M:%S')}")
     print(f"Duração: {duracao_formatada}")
 
+def rebuild_totals():
+    """Recalcular os totais diários a partir de todos os registros"""
+    with transaction("IMMEDIATE") as conn:
+        rebuild_daily_totals(conn)
+        dias = conn.execute("SELECT COUNT(DISTINCT dia) FROM totais_diarios").fetchone()[0]
+    
+    print(f"Totais diários recalculados: {dias} dia(s)")
+
+def change_storage_format(formato=None):
+    """Mostrar ou alterar o formato de armazenamento dos timestamps (iso ou epoch)"""
+    conn = getConnection()
+    invalidate_storage_format()
+    
+    if formato is None:
+        print(f"Formato de armazenamento atual: {storage_format(conn)}")
+        return
+    
+    with transaction("IMMEDIATE") as conn:
+        atual = storage_format(conn)
+        if atual != formato:
+            # Reconstruir os índices uma vez é mais barato que atualizá-los a cada linha
+            with deferred_indexes(conn, "registros"):
+                convertidos = convert_storage(conn, formato)
+            # Frações de segundo descartadas podem mover segundos entre dias
+            rebuild_daily_totals(conn)
+    
+    if atual == formato:
+        print(f"O banco já está no formato '{formato}'.")
+        return
+    
+    reversao = FORMATO_ISO if formato == FORMATO_EPOCH else FORMATO_EPOCH
+    print(f"{convertidos} registro(s) convertido(s) para o formato '{formato}'.")
+    print(f"Para reverter: timetracker storage {reversao}")
@@ -2,4 +2,9 @@ def format_duration(seconds):
     """Formatar duração em segundos para formato legível"""
     hours, remainder = divmod(seconds, 3600)
     minutes, seconds = divmod(remainder, 60)
-    return f"{hours:02d}:{minutes:02d}:{seconds:02d}"
\ No newline at end of file
+    return f"{hours:02d}:{minutes:02d}:{seconds:02d}"
+
+def format_balance(seconds):
+    """Formatar um saldo em segundos, que pode ser negativo, com sinal explícito"""
+    sinal = "-" if seconds < 0 else "+"
+    return sinal + format_duration(abs(seconds))
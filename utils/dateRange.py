@@ -0,0 +1,38 @@
+import datetime
+
+
+def parse_date(texto):
+    """Converter uma data no formato YYYY-MM-DD, levantando ValueError se inválida"""
+    try:
+        return datetime.date.fromisoformat(texto)
+    except (TypeError, ValueError):
+        raise ValueError(f"Data inválida '{texto}'. Use o formato YYYY-MM-DD")
+
+
+def day_range(data_inicio=None, data_fim=None):
+    """
+    Converter datas informadas pelo usuário em limites de um intervalo semiaberto
+    [inicio, fim) comparáveis diretamente com a coluna registros.inicio.
+
+    As datas são inclusivas: data_fim=2025-02-10 inclui todo o dia 10.
+    Limites não informados são retornados como None.
+
+    Os limites são datas ISO sem horário: como os registros são gravados como
+    'YYYY-MM-DDTHH:MM:SS', a comparação textual preserva a ordem e a consulta
+    pode usar o índice em inicio (ao contrário de date(inicio) >= ?).
+    """
+    inicio = parse_date(data_inicio).isoformat() if data_inicio else None
+    fim = None
+    if data_fim:
+        fim = (parse_date(data_fim) + datetime.timedelta(days=1)).isoformat()
+    return inicio, fim
+
+
+def month_range(ano, mes):
+    """Limites [inicio, fim) do mês informado"""
+    inicio = datetime.date(ano, mes, 1)
+    if mes == 12:
+        fim = datetime.date(ano + 1, 1, 1)
+    else:
+        fim = datetime.date(ano, mes + 1, 1)
+    return inicio.isoformat(), fim.isoformat()
@@ -0,0 +1,9 @@
+import importlib
+
+
+def lazy_callable(modulo, nome):
+    """Retornar uma função que só importa `modulo` quando for chamada pela primeira vez"""
+    def chamar(*args, **kwargs):
+        return getattr(importlib.import_module(modulo), nome)(*args, **kwargs)
+    chamar.__name__ = nome
+    return chamar
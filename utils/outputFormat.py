@@ -0,0 +1,56 @@
+import csv
+import json
+import sys
+
+# Formatos legíveis por máquina aceitos por --format ('tabela' é a saída padrão)
+FORMATOS_SAIDA = ('tabela', 'json', 'ndjson', 'csv', 'tsv')
+
+
+def _json_linha(colunas, linha):
+    return json.dumps(dict(zip(colunas, linha)), ensure_ascii=False)
+
+
+def write_rows(formato, colunas, linhas, saida=None):
+    """
+    Escrever `linhas` (tuplas, ex.: um cursor) em `formato`, sem convertê-las.
+
+    Os valores saem como estão no banco (timestamps ISO, durações em
+    segundos). As linhas são consumidas uma a uma: nada é acumulado em
+    memória, e no NDJSON cada linha é escrita assim que lida.
+    Retorna a quantidade de linhas escritas.
+    """
+    saida = saida or sys.stdout
+    quantidade = 0
+
+    if formato in ('csv', 'tsv'):
+        writer = csv.writer(saida, delimiter='\t' if formato == 'tsv' else ',', lineterminator='\n')
+        writer.writerow(colunas)
+        for linha in linhas:
+            writer.writerow(linha)
+            quantidade += 1
+
+    elif formato == 'ndjson':
+        for linha in linhas:
+            saida.write(_json_linha(colunas, linha) + "\n")
+            quantidade += 1
+
+    elif formato == 'json':
+        saida.write("[")
+        for linha in linhas:
+            saida.write(("," if quantidade else "") + "\n  " + _json_linha(colunas, linha))
+            quantidade += 1
+        saida.write("\n]\n" if quantidade else "]\n")
+
+    else:
+        raise ValueError(f"Formato de saída desconhecido: '{formato}'")
+
+    return quantidade
+
+
+def write_object(formato, colunas, linha, saida=None):
+    """Escrever um único registro: objeto em JSON/NDJSON, cabeçalho e uma linha em CSV/TSV"""
+    saida = saida or sys.stdout
+    if formato in ('json', 'ndjson'):
+        saida.write(_json_linha(colunas, linha) + "\n")
+    else:
+        write_rows(formato, colunas, (linha,), saida)